@@ -0,0 +1,237 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from features import load_prepared_dataset
+
+
+# The prepared columns the cube summarizes; they also define the dataset hash
+CUBE_COLUMNS = ['title', 'genre', 'studio', 'number_of_episodes', 'content_type', 'viewer_reviews', 'score',
+                'release_year', 'rating_category', 'genre_count']
+NUMERIC_COLUMNS = ['number_of_episodes', 'viewer_reviews', 'score', 'release_year', 'genre_count']
+COUNT_TABLES = ['studios', 'genres', 'genre_combos', 'genre_count', 'content_types', 'years', 'episodes',
+                'ratings', 'rating_categories']
+TOP_RATED = 50
+# Calibrated scores are continuous; the 'ratings' count table bins them to this many decimals
+SCORE_DECIMALS = 2
+
+
+def row_hashes(df_clean):
+    """One uint64 per row over CUBE_COLUMNS, independent of CSV vs Parquet dtypes"""
+    columns = df_clean[CUBE_COLUMNS].copy()
+    for column in CUBE_COLUMNS:
+        if column in NUMERIC_COLUMNS:
+            columns[column] = pd.to_numeric(columns[column], errors='coerce').astype(float)
+        else:
+            columns[column] = columns[column].astype(object).astype(str)
+    return pd.util.hash_pandas_object(columns, index=False).to_numpy(dtype=np.uint64)
+
+
+def dataset_key(rows, hash_sum):
+    return f"{rows}:{hash_sum:016x}"
+
+
+def _hash_sum(hashes):
+    # Wrapping uint64 sum: order-independent, and extending a dataset only adds its new rows' hashes
+    return int(np.sum(hashes, dtype=np.uint64))
+
+
+def _add_counts(table, counts):
+    for value, count in counts.items():
+        table[value] = table.get(value, 0) + int(count)
+
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SummaryCube:
+    """Additive group statistics behind the notebook's studio/genre/type/year/rating analyses.
+
+    Ratings are the calibrated 0-10 `score` (see features.clean_dataset), so
+    MAL and AniList titles share one scale. Every table is a count or a
+    (count, sum) pair, so the cube for a dataset plus appended rows is the
+    old cube plus the new rows' statistics: update never has to revisit rows
+    already counted. Medians, spreads and histograms are read back from
+    per-value counts. The cube is keyed on an order-independent hash of the
+    rows it was built from (see load_or_build).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.hash_sum = 0
+        self.counts = {name: {} for name in COUNT_TABLES}
+        self.by_type = {'episodes': {}, 'ratings': {}}  # content_type -> [count, sum]
+        self.top_rated = []  # [title, score, content_type, release_year], best first
+
+    @property
+    def key(self):
+        return dataset_key(self.rows, self.hash_sum)
+
+    @classmethod
+    def build(cls, df_clean):
+        return cls().update(df_clean)
+
+    def update(self, df_clean, hashes=None):
+        """Fold rows appended to the dataset into the cube"""
+        if len(df_clean) == 0:
+            return self
+        hashes = row_hashes(df_clean) if hashes is None else hashes
+        self.rows += len(df_clean)
+        self.hash_sum = (self.hash_sum + _hash_sum(hashes)) % 2 ** 64
+
+        episodes = df_clean['number_of_episodes']
+        ratings = pd.to_numeric(df_clean['score'], errors='coerce').astype(float)
+        genre = df_clean['genre'].astype(str)
+        content_type = df_clean['content_type'].astype(str)
+        has_episodes = episodes > 0
+        rated = ratings.notna()
+
+        tokens = genre.str.split(',').explode().str.strip()
+        tables = {
+            'studios': df_clean['studio'].astype(str).value_counts(),
+            'genres': tokens[(tokens != '') & (tokens != 'Unknown')].value_counts(),
+            'genre_combos': genre[genre != 'Unknown'].value_counts(),
+            'genre_count': df_clean['genre_count'].value_counts(),
+            'content_types': content_type.value_counts(),
+            'years': df_clean['release_year'].dropna().value_counts(),
+            'episodes': episodes[has_episodes].value_counts(),
+            'ratings': ratings[rated].round(SCORE_DECIMALS).value_counts(),
+            'rating_categories': df_clean.loc[rated, 'rating_category'].astype(str).value_counts(),
+        }
+        for name, counts in tables.items():
+            _add_counts(self.counts[name], {_python(value): count for value, count in counts.items()})
+
+        for name, values, mask in (('episodes', episodes, has_episodes), ('ratings', ratings, rated)):
+            grouped = values[mask].groupby(content_type[mask]).agg(['count', 'sum'])
+            for group, (count, total) in grouped.iterrows():
+                entry = self.by_type[name].setdefault(group, [0, 0.0])
+                entry[0] += int(count)
+                entry[1] += float(total)
+
+        best = df_clean[rated].assign(score=ratings[rated]).nlargest(TOP_RATED, 'score')
+        candidates = self.top_rated + [
+            [row.title, float(row.score), str(row.content_type), _python(row.release_year)]
+            for row in best[['title', 'score', 'content_type', 'release_year']].itertuples()
+        ]
+        # Stable sort keeps earlier rows first among ties, like nlargest(keep='first') on the full frame
+        self.top_rated = sorted(candidates, key=lambda row: -row[1])[:TOP_RATED]
+        return self
+
+    def value_counts(self, name, exclude=('Unknown',)):
+        """A count table as a Series ordered like value_counts()"""
+        counts = pd.Series({value: count for value, count in self.counts[name].items() if value not in exclude},
+                           dtype='int64', name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def distribution(self, name):
+        """(values, counts) sorted by value, e.g. for plt.hist(values, weights=counts)"""
+        items = sorted(self.counts[name].items())
+        return (np.array([value for value, _ in items], dtype=float),
+                np.array([count for _, count in items], dtype=np.int64))
+
+    def describe(self, name):
+        """count/mean/median/std/min/max/mode of a numeric table ('episodes', 'ratings', 'years', 'genre_count')"""
+        values, counts = self.distribution(name)
+        n = int(counts.sum())
+        if n == 0:
+            return {'count': 0}
+        mean = float((values * counts).sum() / n)
+        cumulative = np.cumsum(counts)
+        lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+        upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+        std = float(np.sqrt((counts * (values - mean) ** 2).sum() / (n - 1))) if n > 1 else float('nan')
+        return {
+            'count': n,
+            'mean': mean,
+            'median': float((lower + upper) / 2),
+            'std': std,
+            'min': float(values[0]),
+            'max': float(values[-1]),
+            'mode': float(values[np.argmax(counts)]),
+        }
+
+    def mean_by_type(self, name):
+        """Average 'episodes' or 'ratings' per content_type, highest first"""
+        means = pd.Series({group: total / count for group, (count, total) in self.by_type[name].items() if count},
+                          dtype=float)
+        return means.sort_values(ascending=False)
+
+    def top_rated_frame(self, n=10):
+        return pd.DataFrame(self.top_rated[:n], columns=['title', 'score', 'content_type', 'release_year'])
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'rows': self.rows,
+            'hash_sum': self.hash_sum,
+            # (value, count) pairs keep numeric values numeric through JSON
+            'counts': {name: [[value, count] for value, count in table.items()] for name, table in self.counts.items()},
+            'by_type': self.by_type,
+            'top_rated': self.top_rated,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        cube = cls()
+        cube.rows = state['rows']
+        cube.hash_sum = state['hash_sum']
+        cube.counts = {name: {value: count for value, count in pairs} for name, pairs in state['counts'].items()}
+        cube.by_type = state['by_type']
+        cube.top_rated = state['top_rated']
+        return cube
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_or_build(df_clean, filename='summary_cube.json'):
+    """The cube for df_clean, from filename when it matches, else updated or rebuilt and saved.
+
+    A saved cube whose key matches the dataset is returned as is. If it was
+    built from the first N rows of df_clean (rows appended since), only the
+    new rows are folded in.
+    """
+    hashes = row_hashes(df_clean)
+    key = dataset_key(len(hashes), _hash_sum(hashes))
+    if os.path.exists(filename):
+        cube = SummaryCube.load(filename)
+        if cube.key == key:
+            return cube
+        prefix = cube.rows
+        if prefix < len(hashes) and dataset_key(prefix, _hash_sum(hashes[:prefix])) == cube.key:
+            cube.update(df_clean.iloc[prefix:], hashes[prefix:])
+            cube.save(filename)
+            return cube
+
+    cube = SummaryCube.build(df_clean)
+    cube.save(filename)
+    return cube
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python aggregates.py <dataset .csv/.parquet> [summary_cube.json]")
+        sys.exit(1)
+
+    filename = sys.argv[2] if len(sys.argv) == 3 else 'summary_cube.json'
+    cube = load_or_build(load_prepared_dataset(sys.argv[1]), filename)
+    ratings = cube.describe('ratings')
+    print(f"✅ Summary cube {cube.key} saved to {filename}")
+    print(f"📺 {cube.rows:,} anime, {len(cube.value_counts('studios')):,} studios, "
+          f"{len(cube.value_counts('genres'))} genres")
+    if ratings['count']:
+        print(f"⭐ Average score {ratings['mean']:.2f}/10 over {ratings['count']:,} rated titles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+def _int_or_none(value):
+    return int(value) if value is not None else None
+
+
+STATUSES = ['CURRENT', 'PLANNING', 'COMPLETED', 'DROPPED', 'PAUSED', 'REPEATING']
+
+
+def _status_distribution(media):
+    counts = {entry['status']: entry['amount']
+              for entry in ((media.get('stats') or {}).get('statusDistribution') or [])}
+    return {f"status_{status.lower()}": _int_or_none(counts.get(status)) for status in STATUSES}
+
+
+# Optional feature groups: name -> (GraphQL selection, mapper from a media node to typed columns)
+ANILIST_FIELDS = {
+    'popularity': ('popularity', lambda m: {'popularity': _int_or_none(m.get('popularity'))}),
+    'favourites': ('favourites', lambda m: {'favourites': _int_or_none(m.get('favourites'))}),
+    'trending': ('trending', lambda m: {'trending': _int_or_none(m.get('trending'))}),
+    'status_distribution': ('stats { statusDistribution { status amount } }', _status_distribution),
+    'updated_at': ('updatedAt', lambda m: {'updated_at': _int_or_none(m.get('updatedAt'))}),
+}
+
+FIELD_COLUMNS = {
+    'popularity': ['popularity'],
+    'favourites': ['favourites'],
+    'trending': ['trending'],
+    'status_distribution': [f"status_{status.lower()}" for status in STATUSES],
+    'updated_at': ['updated_at'],
+}
+
+# updated_at lets refresh runs skip titles that have not changed
+DEFAULT_FIELDS = ('popularity', 'favourites', 'trending', 'status_distribution', 'updated_at')
+ANILIST_COLUMNS = ['anilist_id'] + [column for columns in FIELD_COLUMNS.values() for column in columns]
+
+# Cheap sweep over recently edited entries: just enough to tell which known titles changed
+UPDATED_SINCE_QUERY = '''
+        query ($page: Int, $perPage: Int) {
+            Page(page: $page, perPage: $perPage) {
+                pageInfo {
+                    hasNextPage
+                }
+                media(type: ANIME, sort: UPDATED_AT_DESC) {
+                    id
+                    updatedAt
+                }
+            }
+        }
+        '''
+
+# What map_anilist_media needs for the base CSV row
+BASE_SELECTION = '''
+                    id
+                    title {
+                        romaji
+                        english
+                        native
+                    }
+                    genres
+                    studios(isMain: true) {
+                        nodes {
+                            name
+                        }
+                    }
+                    episodes
+                    startDate {
+                        year
+                        month
+                    }
+                    format
+                    averageScore'''
+
+
+class AniListQuery:
+    """Assemble one Page query for the base row plus the requested feature groups.
+
+    Only the selected groups are asked for, so the payload stays minimal, and
+    labels (popularity) arrive in the same paginated sweep as the features.
+    """
+
+    def __init__(self, fields=DEFAULT_FIELDS):
+        unknown = [field for field in fields if field not in ANILIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown AniList fields {unknown} (available: {', '.join(ANILIST_FIELDS)})")
+        self.fields = list(dict.fromkeys(fields))
+
+    @property
+    def columns(self):
+        return [column for field in self.fields for column in FIELD_COLUMNS[field]]
+
+    def selection(self):
+        extra = ''.join(f"\n                    {ANILIST_FIELDS[field][0]}" for field in self.fields)
+        return BASE_SELECTION + extra
+
+    def build(self, filter_args='type: ANIME, sort: POPULARITY_DESC', variables='$page: Int, $perPage: Int'):
+        return f'''
+        query ({variables}) {{
+            Page(page: $page, perPage: $perPage) {{
+                pageInfo {{
+                    hasNextPage
+                    total
+                    currentPage
+                }}
+                media({filter_args}) {{{self.selection()}
+                }}
+            }}
+        }}
+        '''
+
+    def build_by_ids(self):
+        """Page query over an explicit $ids list, up to perPage (max 50) titles per request"""
+        return self.build(filter_args='id_in: $ids, type: ANIME',
+                          variables='$page: Int, $perPage: Int, $ids: [Int]')
+
+    def map_fields(self, media):
+        """Typed columns for the selected feature groups"""
+        row = {}
+        for field in self.fields:
+            row.update(ANILIST_FIELDS[field][1](media))
+        return row
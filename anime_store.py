@@ -0,0 +1,254 @@
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from anilist_query import ANILIST_COLUMNS
+from dataset_store import CSV_FIELDNAMES, csv_row, load_dataset, read_csv_records
+from entity_resolution import normalize_title
+from records import AnimeRecord
+
+
+STORE_COLUMNS = CSV_FIELDNAMES + ['mal_id'] + ANILIST_COLUMNS
+
+# Which ID identifies a row from each source. Rows without one (e.g. from CSVs written before IDs were
+# kept) fall back to normalized title plus release date, which still tells sequels like "NEW GAME!!" apart
+SOURCE_ID_FIELDS = {'MyAnimeList': 'mal_id', 'AniList': 'anilist_id'}
+
+
+def title_key(record):
+    """Fallback source_id for a record without its source's ID"""
+    return f"title:{normalize_title(record.get('title'))}:{record.get('release_date') or ''}"
+
+
+def anime_key(record):
+    """Stable (source, source_id) key for a record"""
+    source = record.get('source') or 'Unknown'
+    id_field = SOURCE_ID_FIELDS.get(source)
+    if id_field and record.get(id_field) not in (None, ''):
+        return source, str(record[id_field])
+    return source, title_key(record)
+
+
+def _row_values(record, source):
+    typed = record if isinstance(record, AnimeRecord) else AnimeRecord.from_dict(record)
+    return [source if column == 'source' else typed.get(column) for column in STORE_COLUMNS]
+
+
+class AnimeStore:
+    """Keyed SQLite copy of the dataset that scrapes upsert into.
+
+    Rows are keyed on anime_key, so a re-scraped title updates its row in
+    place instead of the whole file being rewritten, and rows whose values
+    did not change are not touched at all. A row first stored under its
+    title key moves to its ID key once a scrape supplies the ID. Every
+    insert, update and delete is appended to a change log; downstream jobs
+    keep a cursor into it (see delta) and only process what changed since
+    their last run.
+    """
+
+    def __init__(self, path='anime_dataset.sqlite'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        columns = ''.join(f',\n                "{column}"' for column in STORE_COLUMNS)
+        self.conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS anime (
+                source_id TEXT{columns},
+                stored_at REAL,
+                PRIMARY KEY (source, source_id)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS changes (
+                change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT,
+                source_id TEXT,
+                op TEXT,
+                columns TEXT,
+                changed_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cursors (consumer TEXT PRIMARY KEY, change_id INTEGER)')
+        self.conn.commit()
+
+    def upsert(self, records):
+        """Insert new rows and update changed ones in one transaction. Returns counts per outcome"""
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'rekeyed': 0, 'replaced': 0}
+        now = time.time()
+        quoted = ', '.join(f'"{column}"' for column in STORE_COLUMNS)
+        placeholders = ', '.join('?' for _ in STORE_COLUMNS)
+        with self.lock, self.conn:
+            for record in records:
+                source, source_id = anime_key(record)
+                values = _row_values(record, source)
+                existing = self.conn.execute(f'SELECT {quoted} FROM anime WHERE source = ? AND source_id = ?',
+                                             (source, source_id)).fetchone()
+
+                # The same title stored before its ID was known moves to the ID key instead of staying twice
+                untracked_id = title_key(record)
+                rekeyed = 0
+                if source_id != untracked_id and existing is None:
+                    assignments = ', '.join(f'"{column}" = ?' for column in STORE_COLUMNS)
+                    rekeyed = self.conn.execute(
+                        f'UPDATE anime SET source_id = ?, {assignments}, stored_at = ? WHERE source = ? AND source_id = ?',
+                        (source_id, *values, now, source, untracked_id)).rowcount
+                    if rekeyed:
+                        self._log(source, untracked_id, 'delete', [], now)
+                        self._log(source, source_id, 'insert', STORE_COLUMNS, now)
+                elif source_id != untracked_id:
+                    deleted = self.conn.execute('DELETE FROM anime WHERE source = ? AND source_id = ?',
+                                                (source, untracked_id)).rowcount
+                    if deleted:
+                        self._log(source, untracked_id, 'delete', [], now)
+                        counts['replaced'] += 1
+
+                if rekeyed:
+                    counts['rekeyed'] += 1
+                elif existing is None:
+                    self.conn.execute(f'INSERT INTO anime VALUES (?, {placeholders}, ?)',
+                                      (source_id, *values, now))
+                    self._log(source, source_id, 'insert', STORE_COLUMNS, now)
+                    counts['inserted'] += 1
+                else:
+                    changed = [column for column, old, new in zip(STORE_COLUMNS, existing, values) if old != new]
+                    if not changed:
+                        counts['unchanged'] += 1
+                    else:
+                        assignments = ', '.join(f'"{column}" = ?' for column in changed)
+                        self.conn.execute(
+                            f'UPDATE anime SET {assignments}, stored_at = ? WHERE source = ? AND source_id = ?',
+                            [values[STORE_COLUMNS.index(column)] for column in changed] + [now, source, source_id])
+                        self._log(source, source_id, 'update', changed, now)
+                        counts['updated'] += 1
+
+                # A MAL title since merged into another source's row is now stored under that row's key
+                mal_id = record.get('mal_id')
+                if source != 'MyAnimeList' and mal_id not in (None, ''):
+                    deleted = self.conn.execute('DELETE FROM anime WHERE source = ? AND source_id = ?',
+                                                ('MyAnimeList', str(mal_id))).rowcount
+                    if deleted:
+                        self._log('MyAnimeList', str(mal_id), 'delete', [], now)
+                        counts['replaced'] += 1
+        return counts
+
+    def _log(self, source, source_id, op, columns, now):
+        self.conn.execute('INSERT INTO changes (source, source_id, op, columns, changed_at) VALUES (?, ?, ?, ?, ?)',
+                          (source, source_id, op, json.dumps(columns), now))
+
+    def last_change_id(self):
+        with self.lock:
+            return self.conn.execute('SELECT COALESCE(MAX(change_id), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, change_id=0):
+        """Change log entries after change_id, oldest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT change_id, source, source_id, op, columns, changed_at FROM changes '
+                'WHERE change_id > ? ORDER BY change_id', (change_id,)
+            ).fetchall()
+        return [{'change_id': row[0], 'source': row[1], 'source_id': row[2], 'op': row[3],
+                 'columns': json.loads(row[4]), 'changed_at': row[5]} for row in rows]
+
+    def frame(self, keys=None):
+        """Stored rows as a DataFrame with the save_to_csv columns (plus mal_id), optionally only `keys`"""
+        quoted = ', '.join(f'"{column}"' for column in STORE_COLUMNS)
+        with self.lock:
+            df = pd.read_sql_query(f'SELECT source_id, {quoted} FROM anime ORDER BY rowid', self.conn)
+        if keys is not None:
+            wanted = set(keys)
+            df = df[[key in wanted for key in zip(df['source'], df['source_id'])]]
+        return df.drop(columns='source_id').reset_index(drop=True)
+
+    def records(self, source=None):
+        """Stored rows as AnimeRecords, optionally for one source"""
+        df = self.frame()
+        if source is not None:
+            df = df[df['source'] == source]
+        return [AnimeRecord.from_dict({key: value for key, value in row.items() if pd.notna(value)})
+                for row in df.to_dict('records')]
+
+    def cursor(self, consumer):
+        with self.lock:
+            row = self.conn.execute('SELECT change_id FROM cursors WHERE consumer = ?', (consumer,)).fetchone()
+        return row[0] if row else 0
+
+    def advance(self, consumer, change_id):
+        """Record that `consumer` has processed every change up to change_id"""
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)', (consumer, change_id))
+
+    def delta(self, consumer):
+        """(changed rows frame, deleted keys, last change_id) since consumer's cursor.
+
+        Call advance(consumer, change_id) once the delta has been processed,
+        so a failed run sees the same delta again.
+        """
+        changes = self.changes_since(self.cursor(consumer))
+        latest = {}
+        for change in changes:
+            latest[(change['source'], change['source_id'])] = change['op']
+        deleted = [key for key, op in latest.items() if op == 'delete']
+        changed = [key for key, op in latest.items() if op != 'delete']
+        last = changes[-1]['change_id'] if changes else self.cursor(consumer)
+        return self.frame(changed), deleted, last
+
+    def export_csv(self, filename, df=None):
+        """Write rows as a save_to_csv-style file (every stored row unless df is given)"""
+        df = self.frame() if df is None else df
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=STORE_COLUMNS)
+            writer.writeheader()
+            for row in df.to_dict('records'):
+                writer.writerow(csv_row({key: None if pd.isna(value) else value for key, value in row.items()},
+                                        STORE_COLUMNS))
+        print(f"✅ Exported {len(df)} rows to {filename}")
+
+
+def load_records(filename):
+    """Rows of a save_to_csv CSV or a Parquet/Arrow dataset, as dicts"""
+    if filename.endswith('.csv'):
+        return read_csv_records(filename)
+    df = load_dataset(filename)
+    return [{key: value for key, value in row.items() if pd.notna(value)} for row in df.to_dict('records')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyed, incrementally updated anime dataset store")
+    parser.add_argument('--store', default='anime_dataset.sqlite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    upsert = commands.add_parser('upsert', help="merge a .csv/.parquet dataset into the store")
+    upsert.add_argument('dataset')
+    export = commands.add_parser('export', help="write every stored row to a CSV")
+    export.add_argument('csv')
+    delta = commands.add_parser('delta', help="write rows changed since CONSUMER last ran, then advance it")
+    delta.add_argument('consumer')
+    delta.add_argument('csv')
+    changes = commands.add_parser('changes', help="print the change log")
+    changes.add_argument('--since', type=int, default=0)
+    args = parser.parse_args()
+
+    store = AnimeStore(args.store)
+    if args.command == 'upsert':
+        counts = store.upsert(load_records(args.dataset))
+        print(f"✅ {args.dataset} -> {args.store}: " + ', '.join(f"{count} {outcome}" for outcome, count in counts.items()))
+    elif args.command == 'export':
+        store.export_csv(args.csv)
+    elif args.command == 'delta':
+        df, deleted, last = store.delta(args.consumer)
+        store.export_csv(args.csv, df)
+        if deleted:
+            print(f"  {len(deleted)} rows deleted since {args.consumer}'s last run")
+        store.advance(args.consumer, last)
+    else:
+        for change in store.changes_since(args.since):
+            print(f"{change['change_id']:>6} {change['op']:<6} {change['source']}/{change['source_id']} "
+                  f"{', '.join(change['columns']) if change['op'] == 'update' else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Synthetic AniList GraphQL Page responses shaped like the scraper's query, for offline benchmarks"""
+import json
+import random
+
+GENRES = ['Action', 'Adventure', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi', 'Slice of Life', 'Sports']
+STUDIOS = ['Madhouse', 'Bones', 'Kyoto Animation', 'MAPPA', 'Production I.G', 'Sunrise', 'Wit Studio', 'ufotable']
+FORMATS = ['TV', 'TV_SHORT', 'MOVIE', 'OVA', 'ONA', 'SPECIAL']
+STATUSES = ['CURRENT', 'PLANNING', 'COMPLETED', 'DROPPED', 'PAUSED', 'REPEATING']
+
+
+def synthetic_media(rank):
+    """One media node for the rank-th most popular title"""
+    rng = random.Random(rank)
+    english = f"Anime Title {rank}" if rank % 3 else None
+    popularity = max(1000, 3000000 - rank * 500)
+    return {
+        'id': 100000 + rank,
+        'title': {'romaji': f"Anime Romaji {rank}", 'english': english, 'native': f"アニメ {rank}"},
+        'genres': rng.sample(GENRES, rng.randint(1, 3)),
+        'studios': {'nodes': [{'name': rng.choice(STUDIOS)}]},
+        'episodes': rng.choice([None, 1, 12, 13, 24, 25, 50]),
+        'startDate': {'year': rng.randint(1975, 2025), 'month': rng.choice([None] + list(range(1, 13)))},
+        'format': rng.choice(FORMATS),
+        'averageScore': rng.choice([None] + list(range(45, 92))),
+        'popularity': popularity,
+        'favourites': popularity // rng.randint(10, 60),
+        'trending': rng.randint(0, 300),
+        'stats': {'statusDistribution': [{'status': status, 'amount': rng.randint(0, popularity)}
+                                         for status in STATUSES]},
+        'updatedAt': 1700000000 + rank,
+    }
+
+
+def synthetic_anilist_page(page, per_page=50, total=5000):
+    """Return bytes for the JSON response to a popularity-sorted Page(page, perPage) query"""
+    start = (page - 1) * per_page
+    end = min(total, start + per_page)
+    media = [synthetic_media(rank) for rank in range(start + 1, end + 1)]
+    payload = {'data': {'Page': {
+        'pageInfo': {'hasNextPage': end < total, 'total': total, 'currentPage': page},
+        'media': media,
+    }}}
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
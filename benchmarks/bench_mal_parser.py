@@ -0,0 +1,93 @@
+"""Compare MAL ranking-page parser backends on saved pages.
+
+Usage:
+    python benchmarks/bench_mal_parser.py [saved_pages_dir] [--repeat N]
+
+Point it at a directory of saved topanime.php pages (*.html). Without one,
+synthetic pages with MAL's ranking-row markup are used. Every backend's
+output is checked field-for-field against the BeautifulSoup reference, and
+every row must come out with a title; either failure exits non-zero.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mal_parser import PARSERS, parse_mal_ranking_page
+from mal_fixtures import synthetic_mal_page
+
+
+def load_pages(pages_dir, synthetic_count):
+    if pages_dir:
+        paths = sorted(glob.glob(os.path.join(pages_dir, '*.html')))
+        if not paths:
+            sys.exit(f"No *.html pages found in {pages_dir}")
+        pages = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+        return pages
+    return [synthetic_mal_page(i * 50) for i in range(synthetic_count)]
+
+
+def first_mismatch(output, reference):
+    """(page, row, field) of the first difference from the reference, or None"""
+    for page_index, (page, expected_page) in enumerate(zip(output, reference)):
+        if len(page) != len(expected_page):
+            return page_index, None, f'{len(page)} rows instead of {len(expected_page)}'
+        for row_index, (record, expected) in enumerate(zip(page, expected_page)):
+            for field in sorted(set(record) | set(expected)):
+                if record.get(field) != expected.get(field):
+                    return page_index, row_index, field
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MAL ranking-page parser backends")
+    parser.add_argument('pages_dir', nargs='?', help="directory of saved topanime.php pages")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--synthetic-pages', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, args.synthetic_pages)
+    total_bytes = sum(len(p) for p in pages)
+    print(f"Parsing {len(pages)} pages ({total_bytes / 1024:.0f} KiB) x{args.repeat}")
+
+    reference = [parse_mal_ranking_page(p, 'bs4') for p in pages]
+    rows = sum(len(r) for r in reference)
+    if not rows:
+        sys.exit("The bs4 reference parsed no ranking rows")
+
+    results = {}
+    for backend in PARSERS:
+        output = [parse_mal_ranking_page(p, backend) for p in pages]
+        untitled = sum(not record['title'] for page in output for record in page)
+        if untitled:
+            sys.exit(f"{backend}: {untitled} of {rows} rows parsed without a title")
+        mismatch = first_mismatch(output, reference)
+        if mismatch:
+            page_index, row_index, field = mismatch
+            sys.exit(f"{backend}: differs from bs4 on page {page_index}, row {row_index}: {field}")
+
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.process_time()
+            for p in pages:
+                parse_mal_ranking_page(p, backend)
+            best = min(best, time.process_time() - start)
+        results[backend] = best
+
+        print(f"  {backend:<11} {best * 1000 / len(pages):8.2f} ms/page  "
+              f"{rows / best:10.0f} rows/s")
+
+    baseline = results['bs4']
+    for backend, elapsed in results.items():
+        if backend != 'bs4':
+            print(f"  {backend} is {baseline / elapsed:.1f}x faster than bs4")
+
+
+if __name__ == "__main__":
+    main()
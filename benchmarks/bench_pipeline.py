@@ -0,0 +1,193 @@
+"""Benchmark the whole scrape -> parse -> save pipeline against a local stand-in server.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--target N] [--repeat N] [--fixtures DIR]
+        [--latency-ms N] [--rate-limit-every N] [--save-baseline FILE | --baseline FILE]
+
+MAL and AniList requests are routed to benchmarks/fixture_server.py, which
+runs in a child process so its CPU time and memory are not counted. The
+pipeline is the production one: MalRankingSource and AniListSource through
+a SourceRunner into a DatasetSink, then save_to_csv and save_to_parquet.
+Reports pages/s, records/s, parse time per page (from the scraper's
+telemetry), process CPU time, save time and peak RSS, taking the best of
+--repeat runs. --save-baseline stores the results; --baseline compares
+against stored results and exits non-zero when a metric is more than
+--tolerance worse.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_server import FixtureStore, create_server
+from mal_data import AlternativeAnimeScraper, AniListSource, MalRankingSource, save_to_csv
+from dataset_store import save_to_parquet
+from sources import DatasetSink, SourceRunner
+
+# Metric -> True when higher is better
+METRICS = {
+    'pages_per_second': True,
+    'records_per_second': True,
+    'parse_ms_per_page': False,
+    'cpu_seconds': False,
+    'save_seconds': False,
+    'peak_rss_mib': False,
+}
+
+
+class LocalRoutingSession(requests.Session):
+    """Send requests for the real sites to the local fixture server instead"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.routes = {
+            'https://myanimelist.net': base_url,
+            'https://graphql.anilist.co': base_url + '/graphql',
+        }
+
+    def request(self, method, url, **kwargs):
+        for prefix, target in self.routes.items():
+            if url.startswith(prefix):
+                url = target + url[len(prefix):]
+                break
+        return super().request(method, url, **kwargs)
+
+
+def serve(fixtures_dir, options, ready):
+    server = create_server(FixtureStore(fixtures_dir), **options)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def peak_rss_mib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KiB on Linux
+
+
+def run_pipeline(base_url, target, requests_per_second, max_workers, out_dir):
+    scraper = AlternativeAnimeScraper(cache_path=None)
+    scraper.session = LocalRoutingSession(base_url)
+    fetch_options = {'requests_per_second': requests_per_second, 'max_workers': max_workers}
+    sources = [
+        AniListSource(scraper, target // 2, **fetch_options),
+        MalRankingSource(scraper, target + 500, **fetch_options),
+    ]
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    records = SourceRunner(sources, DatasetSink(target, reserved={'AniList': target // 2})).run()
+    save_start = time.perf_counter()
+    save_to_csv(records, os.path.join(out_dir, 'bench.csv'))
+    save_to_parquet(records, os.path.join(out_dir, 'bench.parquet'))
+    save_seconds = time.perf_counter() - save_start
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    parsing = scraper.telemetry.report()['parsing']
+    pages = sum(stats['pages'] for stats in parsing.values())
+    parse_seconds = sum(stats['parse_seconds'] for stats in parsing.values())
+    return {
+        'records': len(records),
+        'pages': pages,
+        'wall_seconds': round(wall, 3),
+        'pages_per_second': round(pages / wall, 2),
+        'records_per_second': round(len(records) / wall, 1),
+        'parse_ms_per_page': round(parse_seconds / pages * 1000, 3) if pages else None,
+        'cpu_seconds': round(cpu, 3),
+        'save_seconds': round(save_seconds, 3),
+    }
+
+
+def best_of(runs):
+    """Best value of each metric across runs"""
+    best = dict(runs[0])
+    for run in runs[1:]:
+        for metric, higher_is_better in METRICS.items():
+            if metric in run and run[metric] is not None:
+                pick = max if higher_is_better else min
+                best[metric] = pick(best[metric], run[metric])
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """Print a metric-by-metric comparison; returns the regressed metric names"""
+    regressions = []
+    print(f"\n{'metric':<20}{'baseline':>12}{'current':>12}{'change':>9}")
+    for metric, higher_is_better in METRICS.items():
+        old, new = baseline['results'].get(metric), results.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        verdict = 'REGRESSION' if worse > tolerance else ''
+        if verdict:
+            regressions.append(metric)
+        print(f"{metric:<20}{old:>12}{new:>12}{change:>+9.1%}  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrape -> parse -> save against a local server")
+    parser.add_argument('--target', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fixtures', help="recorded pages (see fixture_server.py --export-cache); synthetic otherwise")
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--rate-limit-every', type=int, default=25, help="every Nth request gets a 429 (0 disables)")
+    parser.add_argument('--requests-per-second', type=float, default=50)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--baseline', metavar='FILE')
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative slowdown per metric")
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ('target', 'fixtures', 'latency_ms', 'jitter_ms', 'rate_limit_every',
+                                                  'requests_per_second', 'max_workers')}
+    server_options = {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                      'rate_limit_every': args.rate_limit_every}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args.fixtures, server_options, ready), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            for i in range(args.repeat):
+                print(f"\n=== Run {i + 1}/{args.repeat} ===")
+                runs.append(run_pipeline(base_url, args.target, args.requests_per_second, args.max_workers, out_dir))
+    finally:
+        server.terminate()
+
+    results = best_of(runs)
+    results['peak_rss_mib'] = round(peak_rss_mib(), 1)
+    print(f"\nBest of {args.repeat} runs ({results['records']} records, {results['pages']} pages):")
+    for metric in METRICS:
+        print(f"  {metric:<20} {results[metric]}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print(f"⚠️  Baseline was recorded with different settings: {baseline.get('config')}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n✅ No metric regressed beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Local stand-in for myanimelist.net and graphql.anilist.co, for offline benchmarks.
+
+Usage:
+    python benchmarks/fixture_server.py [--fixtures DIR] [--port N] [--latency-ms N] [--rate-limit-every N]
+    python benchmarks/fixture_server.py --export-cache http_cache.sqlite --fixtures DIR
+
+Serves recorded pages from a fixtures directory (mal/limit_<offset>.html,
+anilist/page_<n>.json) and falls back to synthetic pages for anything not
+recorded. --export-cache fills a fixtures directory from the HTTP response
+cache of a real scrape, so real pages can be replayed later. Every response
+can be delayed (--latency-ms, --jitter-ms) and every Nth request answered
+with a 429 (--rate-limit-every) to exercise the fetcher's backoff.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from anilist_fixtures import synthetic_anilist_page
+from mal_fixtures import synthetic_mal_page
+
+
+class FixtureStore:
+    """Recorded responses from a fixtures directory, with synthetic fallbacks"""
+
+    def __init__(self, fixtures_dir=None, mal_total=20000, anilist_total=5000):
+        self.fixtures_dir = fixtures_dir
+        self.mal_total = mal_total
+        self.anilist_total = anilist_total
+
+    def _recorded(self, *parts):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def mal_page(self, offset):
+        recorded = self._recorded('mal', f'limit_{offset}.html')
+        if recorded is not None:
+            return recorded
+        return synthetic_mal_page(offset, rows=max(0, min(50, self.mal_total - offset)))
+
+    def anilist_page(self, page, per_page):
+        recorded = self._recorded('anilist', f'page_{page}.json')
+        if recorded is not None:
+            return recorded
+        return synthetic_anilist_page(page, per_page, self.anilist_total)
+
+
+def export_cache(cache_path, fixtures_dir):
+    """Write MAL ranking and AniList Page responses from a ResponseCache database as fixtures"""
+    os.makedirs(os.path.join(fixtures_dir, 'mal'), exist_ok=True)
+    os.makedirs(os.path.join(fixtures_dir, 'anilist'), exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    exported = {'mal': 0, 'anilist': 0}
+    for url, status, body in conn.execute('SELECT url, status, body FROM responses'):
+        if status != 200:
+            continue
+        parsed = urlparse(url)
+        if parsed.netloc == 'myanimelist.net' and parsed.path == '/topanime.php':
+            query = parse_qs(parsed.query)
+            if 'type' in query:
+                continue  # Category sweeps are not replayed
+            path = os.path.join(fixtures_dir, 'mal', f"limit_{int(query.get('limit', ['0'])[0])}.html")
+        elif parsed.netloc == 'graphql.anilist.co':
+            try:
+                page_info = json.loads(body)['data']['Page']['pageInfo']
+            except (ValueError, KeyError, TypeError):
+                continue
+            if 'total' not in page_info:
+                continue  # updatedAt sweeps and id_in refreshes, not the popularity walk
+            path = os.path.join(fixtures_dir, 'anilist', f"page_{page_info['currentPage']}.json")
+        else:
+            continue
+        with open(path, 'wb') as f:
+            f.write(body)
+        exported['mal' if parsed.netloc == 'myanimelist.net' else 'anilist'] += 1
+    conn.close()
+    return exported
+
+
+def make_handler(store, latency_ms=0, jitter_ms=0, rate_limit_every=0, retry_after=0.1):
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real sites
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, content_type, body, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _throttled(self):
+            """Apply the configured latency; True when this request gets a 429"""
+            with lock:
+                counter['requests'] += 1
+                number = counter['requests']
+            if latency_ms or jitter_ms:
+                time.sleep((latency_ms + random.uniform(0, jitter_ms)) / 1000)
+            if rate_limit_every and number % rate_limit_every == 0:
+                self._send(429, 'text/plain', b'Too Many Requests', {'Retry-After': str(retry_after)})
+                return True
+            return False
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path != '/topanime.php':
+                self._send(404, 'text/plain', b'not found')
+                return
+            if self._throttled():
+                return
+            offset = int(parse_qs(parsed.query).get('limit', ['0'])[0])
+            self._send(200, 'text/html; charset=utf-8', store.mal_page(offset))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            if self.path != '/graphql':
+                self._send(404, 'text/plain', b'not found')
+                return
+            if self._throttled():
+                return
+            variables = (json.loads(body or b'{}').get('variables') or {})
+            page = store.anilist_page(int(variables.get('page', 1)), int(variables.get('perPage', 50)))
+            self._send(200, 'application/json', page)
+
+    return FixtureHandler
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def create_server(store, host='127.0.0.1', port=0, **options):
+    """Server bound to host:port (0 picks a free port; see server.server_address)"""
+    return FixtureServer((host, port), make_handler(store, **options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded MAL/AniList responses on localhost")
+    parser.add_argument('--fixtures', help="directory of recorded pages (mal/, anilist/)")
+    parser.add_argument('--export-cache', metavar='HTTP_CACHE_SQLITE',
+                        help="write the MAL/AniList pages in this response cache into --fixtures and exit")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="answer every Nth request with a 429")
+    args = parser.parse_args()
+
+    if args.export_cache:
+        if not args.fixtures:
+            sys.exit("--export-cache needs --fixtures")
+        exported = export_cache(args.export_cache, args.fixtures)
+        print(f"Exported {exported['mal']} MAL and {exported['anilist']} AniList pages to {args.fixtures}")
+        return
+
+    server = create_server(FixtureStore(args.fixtures), args.host, args.port, latency_ms=args.latency_ms,
+                           jitter_ms=args.jitter_ms, rate_limit_every=args.rate_limit_every)
+    print(f"Serving fixtures on http://{args.host}:{args.port} (MAL at /topanime.php, AniList at /graphql)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Synthetic MAL ranking pages that mirror topanime.php markup, for offline benchmarks"""
+import random
+
+ROW_TEMPLATE = '''<tr class="ranking-list">
+  <td class="rank ac" valign="top"><span class="lightLink top-anime-rank-text rank{rank_class}">{rank}</span></td>
+  <td class="title al va-t word-break">
+    <a class="hoverinfo_trigger fl-l ml12 mr8" id="#area{mal_id}" rel="#info{mal_id}" href="https://myanimelist.net/anime/{mal_id}/{slug}">
+      <img width="50" height="70" alt="Anime: {title}" class="lazyload" data-src="https://cdn.myanimelist.net/r/50x70/images/anime/{mal_id}.jpg" border="0">
+    </a>
+    <div class="detail"><div id="area{mal_id}"><div class="hoverinfo" id="info{mal_id}" rel="a{mal_id}"></div></div>
+      <div class="di-ib clearfix"><h3 class="fl-l fs14 fw-b anime_ranking_h3"><a href="https://myanimelist.net/anime/{mal_id}/{slug}" class="hoverinfo_trigger" id="#area{mal_id}" rel="#info{mal_id}">{title}</a></h3></div><br>
+      <div class="information di-ib mt4">
+        {kind}<br>
+        {start} - {end}<br>
+        {members:,} members
+      </div>
+    </div>
+  </td>
+  <td class="score ac fs14"><div class="js-top-ranking-score-col di-ib al"><i class="icon-score-star fa-solid fa-star mr4 on"></i><span class="text on score-label score-{score_class}">{score}</span></div></td>
+  <td class="your-score ac fs14"><div class="js-top-ranking-your-score-col di-ib al"><i class="icon-score-star fa-solid fa-star mr4"></i><span class="text score-label">N/A</span></div></td>
+  <td class="status ac"><a class="Lightbox_AddEdit btn-addEdit-large btn-anime-add" href="https://myanimelist.net/ownlist/anime/add?selected_series_id={mal_id}">Add to list</a></td>
+</tr>
+'''
+
+KINDS = ['TV ({eps} eps)', 'Movie (1 eps)', 'OVA ({eps} eps)', 'Special ({eps} eps)', 'ONA ({eps} eps)', 'TV (? eps)']
+
+
+def synthetic_mal_page(offset, rows=50, seed=None):
+    """Return bytes for a topanime.php?limit=offset page with `rows` ranking rows"""
+    rng = random.Random(offset if seed is None else seed)
+    body = []
+    for i in range(rows):
+        rank = offset + i + 1
+        mal_id = 1000 + rank * 7
+        title = f"Anime Title {rank} &amp; Friends" if rank % 9 == 0 else f"Anime Title {rank}"
+        year = rng.randint(1975, 2025)
+        score = 9.2 - rank / 2000
+        body.append(ROW_TEMPLATE.format(
+            rank=rank, rank_class=min(rank, 10), mal_id=mal_id, slug=f"Anime_Title_{rank}", title=title,
+            kind=rng.choice(KINDS).format(eps=rng.randint(1, 60)),
+            start=f"Apr {year}", end=f"Jun {year}", members=rng.randint(1000, 4000000),
+            score=f"{score:.2f}", score_class=int(score),
+        ))
+    return (
+        '<!DOCTYPE html><html><head><title>Top Anime - MyAnimeList.net</title></head><body>'
+        '<div id="content"><table class="top-ranking-table"><tr class="table-header">'
+        '<td class="rank">Rank</td><td class="title">Title</td><td class="score">Score</td></tr>'
+        + ''.join(body) +
+        '</table></div></body></html>'
+    ).encode('utf-8')
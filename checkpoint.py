@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+
+
+class ScrapeCheckpoint:
+    """Append-only JSONL journal of scraped pages, keyed by source and page offset.
+
+    Each completed page is written as one line and flushed to disk immediately,
+    so a crash or Ctrl-C loses at most the page in flight. On restart the
+    scrapers replay journaled pages instead of fetching them again. Only each
+    page's byte offset is kept in memory; records are read back on replay.
+    """
+
+    def __init__(self, path='scrape_checkpoint.jsonl'):
+        self.path = path
+        self.pages = {}  # (source, page) -> byte offset of its journal line
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Index any existing journal, ignoring a torn final line"""
+        self.pages = {}
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb+') as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None  # Partial write from an interrupted run
+                if entry is not None and line.endswith(b'\n'):
+                    self.pages[(entry['source'], entry['page'])] = offset
+                elif not line.endswith(b'\n'):
+                    # Drop the torn tail so the next page starts on a fresh line
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+
+        if self.pages:
+            print(f"Resuming from checkpoint {self.path}: {len(self.pages)} pages already scraped")
+
+    def is_done(self, source, page):
+        return (source, page) in self.pages
+
+    def entry(self, source, page):
+        with self.lock, open(self.path, 'rb') as f:
+            f.seek(self.pages[(source, page)])
+            return json.loads(f.readline())
+
+    def records(self, source, page):
+        return self.entry(source, page)['records']
+
+    def page_info(self, source, page):
+        return self.entry(source, page).get('page_info', {})
+
+    def record_page(self, source, page, records, page_info=None):
+        """Append a completed page to the journal (no-op if already journaled)"""
+        with self.lock:
+            if (source, page) in self.pages:
+                return
+            entry = {'source': source, 'page': page, 'records': [dict(record) for record in records],
+                     'page_info': page_info or {}}
+            with open(self.path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            self.pages[(source, page)] = offset
+
+    def clear(self):
+        """Remove the journal once a run has been saved successfully"""
+        with self.lock:
+            self.pages = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,179 @@
+import csv
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from anilist_query import ANILIST_COLUMNS
+
+
+# Low-cardinality text columns are dictionary encoded; they load as pandas categoricals
+SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('genre', pa.dictionary(pa.int32(), pa.string())),
+    ('studio', pa.dictionary(pa.int32(), pa.string())),
+    ('number_of_episodes', pa.int32()),
+    ('release_date', pa.string()),
+    ('release_year', pa.int16()),
+    ('content_type', pa.dictionary(pa.int8(), pa.string())),
+    ('viewer_reviews', pa.float32()),
+    ('source', pa.dictionary(pa.int8(), pa.string())),
+    ('score', pa.float32()),  # Calibrated 0-10 across sources, null when unrated
+] + [(column, pa.int64() if column == 'updated_at' else pa.int32())  # AniList-only, null for MAL rows
+     for column in ANILIST_COLUMNS])
+
+YEAR_RE = re.compile(r'(\d{4})')
+
+CSV_FIELDNAMES = ['title', 'genre', 'studio', 'number_of_episodes',
+                  'release_date', 'content_type', 'viewer_reviews', 'source', 'score']
+
+
+def _to_int(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value):
+    # Empty strings become nulls, matching how pandas reads blanks from the CSV
+    text = str(value).strip() if value else ''
+    return text or None
+
+
+def records_to_table(data):
+    """Convert scraped records (AnimeRecords or row dicts of strings) into a typed Arrow table"""
+    columns = {name: [] for name in SCHEMA.names}
+    for anime in data:
+        release_date = _to_text(anime.get('release_date'))
+        year_match = YEAR_RE.search(release_date) if release_date else None
+
+        columns['title'].append(_to_text(anime.get('title')))
+        columns['genre'].append(_to_text(anime.get('genre')))
+        columns['studio'].append(_to_text(anime.get('studio')))
+        columns['number_of_episodes'].append(_to_int(anime.get('number_of_episodes')))
+        columns['release_date'].append(release_date)
+        columns['release_year'].append(int(year_match.group(1)) if year_match else None)
+        columns['content_type'].append(_to_text(anime.get('content_type')))
+        columns['viewer_reviews'].append(_to_float(anime.get('viewer_reviews')))
+        columns['source'].append(_to_text(anime.get('source')))
+        columns['score'].append(_to_float(anime.get('score')))
+        for column in ANILIST_COLUMNS:
+            columns[column].append(_to_int(anime.get(column)))
+
+    arrays = []
+    for field in SCHEMA:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode().cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+def save_to_parquet(data, filename):
+    """Save data as a typed, dictionary-encoded Parquet file"""
+    if not data:
+        print("No data to save!")
+        return
+
+    pq.write_table(records_to_table(data), filename, compression='zstd')
+    print(f"✅ Data saved to {filename}")
+
+
+def save_to_arrow(data, filename):
+    """Save data as an uncompressed Arrow IPC (Feather v2) file for zero-copy memory mapping"""
+    if not data:
+        print("No data to save!")
+        return
+
+    feather.write_feather(records_to_table(data), filename, compression='uncompressed')
+    print(f"✅ Data saved to {filename}")
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # AniList's 85 scraped as 85.0 is still written as 85
+    return str(value).strip()
+
+
+def csv_row(anime, fieldnames):
+    """The save_to_csv cell values for one record (missing/None fields stay blank)"""
+    return {key: _csv_cell(value) for key, value in anime.items() if key in fieldnames}
+
+
+class StreamingDatasetWriter:
+    """Append record batches to a CSV and/or Parquet file as they arrive.
+
+    The CSV is flushed after every batch, so partial output can be inspected
+    while a long scrape runs; each batch becomes one Parquet row group (the
+    Parquet footer, and so the file, is only complete after close).
+    """
+
+    def __init__(self, csv_filename=None, parquet_filename=None, fieldnames=None):
+        self.fieldnames = fieldnames or CSV_FIELDNAMES + ANILIST_COLUMNS
+        self.rows = 0
+        self.csv_file = None
+        self.parquet_writer = None
+        if csv_filename:
+            self.csv_file = open(csv_filename, 'w', newline='', encoding='utf-8')
+            self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=self.fieldnames)
+            self.csv_writer.writeheader()
+            self.csv_file.flush()
+        if parquet_filename:
+            self.parquet_writer = pq.ParquetWriter(parquet_filename, SCHEMA, compression='zstd')
+
+    def write(self, records):
+        if not records:
+            return
+        if self.csv_file:
+            self.csv_writer.writerows(csv_row(anime, self.fieldnames) for anime in records)
+            self.csv_file.flush()
+        if self.parquet_writer:
+            self.parquet_writer.write_table(records_to_table(records))
+        self.rows += len(records)
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+        if self.parquet_writer:
+            self.parquet_writer.close()
+
+
+def read_csv_records(filename):
+    with open(filename, newline='', encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def convert_csv(csv_filename, filename):
+    """Convert an existing save_to_csv output to Parquet or Arrow (by extension)"""
+    data = read_csv_records(csv_filename)
+    if filename.endswith('.arrow') or filename.endswith('.feather'):
+        save_to_arrow(data, filename)
+    else:
+        save_to_parquet(data, filename)
+
+
+def load_table(filename):
+    """Load a dataset as an Arrow table, memory-mapping the file"""
+    if filename.endswith('.arrow') or filename.endswith('.feather'):
+        # Uncompressed IPC buffers are used in place without copying
+        return feather.read_table(filename, memory_map=True)
+    return pq.read_table(filename, memory_map=True)
+
+
+def load_dataset(filename):
+    """Load a dataset as a pandas DataFrame with numeric and categorical dtypes already set"""
+    integer_dtypes = {pa.int64(): pd.Int64Dtype(), pa.int32(): pd.Int32Dtype(), pa.int16(): pd.Int16Dtype()}
+    return load_table(filename).to_pandas(types_mapper=integer_dtypes.get)
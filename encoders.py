@@ -0,0 +1,153 @@
+import json
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class MultiHotEncoder:
+    """Encode comma-separated columns (genre, studio) as a sparse CSR multi-hot matrix.
+
+    The vocabulary is append-only: partial_fit adds new tokens at the end, so
+    existing column indices never move and previously built matrices and
+    trained models stay valid. Tokens not in the vocabulary are ignored by
+    transform.
+    """
+
+    def __init__(self, name, separator=',', unknown='Unknown'):
+        self.name = name
+        self.separator = separator
+        self.unknown = unknown
+        self.vocabulary = {}
+
+    def _tokens(self, values):
+        """Return (row positions, token strings) for every token in values"""
+        series = pd.Series(values, dtype=object).reset_index(drop=True).fillna('').astype(str)
+        tokens = series.str.split(self.separator).explode().str.strip()
+        mask = (tokens != '') & (tokens != self.unknown)
+        tokens = tokens[mask]
+        return tokens.index.to_numpy(), tokens.to_numpy(dtype=object)
+
+    def partial_fit(self, values):
+        """Add any unseen tokens to the vocabulary"""
+        _, tokens = self._tokens(values)
+        for token in pd.unique(tokens):
+            if token not in self.vocabulary:
+                self.vocabulary[token] = len(self.vocabulary)
+        return self
+
+    def fit(self, values):
+        self.vocabulary = {}
+        return self.partial_fit(values)
+
+    def _small_batch_indices(self, values):
+        # pandas' fixed per-call overhead dominates for a handful of rows (online scoring)
+        rows, cols = [], []
+        for i, value in enumerate(values):
+            if not isinstance(value, str):
+                # Same as the pandas path: missing values have no tokens, anything else is read as text
+                if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+                    continue
+                value = str(value)
+            for token in value.split(self.separator):
+                col = self.vocabulary.get(token.strip())
+                if col is not None:
+                    rows.append(i)
+                    cols.append(col)
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    def transform(self, values):
+        n_rows = len(values)
+        if n_rows <= 64:
+            rows, cols = self._small_batch_indices(list(values))
+        else:
+            rows, tokens = self._tokens(values)
+            cols = pd.Series(tokens, dtype=object).map(self.vocabulary).to_numpy(dtype=float)
+            known = ~np.isnan(cols)
+            rows, cols = rows[known], cols[known].astype(np.int64)
+
+        matrix = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(n_rows, len(self.vocabulary)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1  # A genre listed twice is still one genre
+        return matrix
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    @property
+    def feature_names(self):
+        return [f"{self.name}={token}" for token in sorted(self.vocabulary, key=self.vocabulary.get)]
+
+    def token_counts(self, matrix):
+        """Per-token row counts as a Series sorted like value_counts()"""
+        counts = np.asarray(matrix.sum(axis=0)).ravel().astype(int)
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        return pd.Series(counts, index=tokens, name='count').sort_values(ascending=False, kind='stable')
+
+    def to_dict(self):
+        return {'name': self.name, 'separator': self.separator, 'unknown': self.unknown,
+                'vocabulary': sorted(self.vocabulary, key=self.vocabulary.get)}
+
+    @classmethod
+    def from_dict(cls, state):
+        encoder = cls(state['name'], separator=state['separator'], unknown=state['unknown'])
+        encoder.vocabulary = {token: i for i, token in enumerate(state['vocabulary'])}
+        return encoder
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class FeatureMatrixBuilder:
+    """Stack genre and studio multi-hot blocks into one CSR matrix with a stable column order"""
+
+    def __init__(self, columns=('genre', 'studio')):
+        self.encoders = {column: MultiHotEncoder(column) for column in columns}
+
+    def partial_fit(self, df):
+        for column, encoder in self.encoders.items():
+            encoder.partial_fit(df[column])
+        return self
+
+    def fit(self, df):
+        for column, encoder in self.encoders.items():
+            encoder.fit(df[column])
+        return self
+
+    def transform(self, df):
+        return sp.hstack([encoder.transform(df[column]) for column, encoder in self.encoders.items()],
+                         format='csr')
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    @property
+    def feature_names(self):
+        return [name for encoder in self.encoders.values() for name in encoder.feature_names]
+
+    def to_dict(self):
+        return {column: encoder.to_dict() for column, encoder in self.encoders.items()}
+
+    @classmethod
+    def from_dict(cls, state):
+        builder = cls(columns=tuple(state))
+        builder.encoders = {column: MultiHotEncoder.from_dict(s) for column, s in state.items()}
+        return builder
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
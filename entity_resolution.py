@@ -0,0 +1,232 @@
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+
+NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+DIGITS_RE = re.compile(r'\d+')
+
+# AniList formats and MAL types collapsed to one vocabulary
+CONTENT_TYPE_ALIASES = {
+    'tv': 'tv', 'tv series': 'tv', 'tv short': 'tv',
+    'movie': 'movie',
+    'ova': 'ova',
+    'ona': 'ona',
+    'special': 'special', 'tv special': 'special',
+    'music': 'music',
+}
+
+# viewer_reviews is never filled across sources: each source scores on its own scale. rank is MAL's
+MERGED_FIELDS = ['genre', 'studio', 'number_of_episodes', 'release_date', 'content_type', 'mal_id', 'rank']
+
+# When two sources describe the same anime, the row from the source listed first is kept; the other fills gaps
+SOURCE_PRECEDENCE = ['AniList', 'MyAnimeList']
+
+
+def normalize_title(title):
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    if not title:
+        return ''
+    text = unicodedata.normalize('NFKD', str(title))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return NON_ALNUM_RE.sub(' ', text).strip()
+
+
+def shingles(normalized, n=3):
+    padded = f" {normalized} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def title_numbers(normalized):
+    """Numbers in a title (season, part, year) must agree for a fuzzy match"""
+    return sorted(DIGITS_RE.findall(normalized))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def record_year(record):
+    match = re.match(r'(\d{4})', str(record.get('release_date') or ''))
+    return int(match.group(1)) if match else None
+
+
+def record_episodes(record):
+    try:
+        episodes = int(record.get('number_of_episodes') or 0)
+    except ValueError:
+        return None
+    return episodes or None
+
+
+def record_type(record):
+    return CONTENT_TYPE_ALIASES.get(str(record.get('content_type') or '').strip().lower())
+
+
+def source_rank(record):
+    source = record.get('source')
+    return SOURCE_PRECEDENCE.index(source) if source in SOURCE_PRECEDENCE else len(SOURCE_PRECEDENCE)
+
+
+def record_aliases(record):
+    aliases = [record.get('title')] + list(record.get('aliases') or [])
+    return list(dict.fromkeys(a for a in aliases if a))
+
+
+class MinHasher:
+    """MinHash signatures over character shingles, split into LSH bands"""
+
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm=64, bands=16, seed=7):
+        assert num_perm % bands == 0
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set),
+                             dtype=np.uint64, count=len(shingle_set))
+        permuted = (hashes[:, None] * self.a + self.b) % self.PRIME
+        return permuted.min(axis=0)
+
+    def band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+
+class EntityIndex:
+    """Resolve records from different sources to the same anime.
+
+    Every alias of every record is indexed twice: by exact normalized title,
+    and by MinHash LSH band so that near-identical spellings collide in a
+    bucket. Lookups only compare against bucket-mates, so resolution stays
+    sub-quadratic. Fuzzy candidates must contain the same numbers, and every
+    candidate must agree on year (within one), type and episode count
+    whenever both sides know them.
+    """
+
+    def __init__(self, threshold=0.6, num_perm=64, bands=16):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, bands=bands)
+        self.records = []
+        self.exact = {}
+        self.buckets = {}
+        self.alias_shingles = []  # (record id, shingle set, numbers) per indexed alias
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        """Index a record and return its id"""
+        record_id = len(self.records)
+        self.records.append(record)
+        self._index_aliases(record_id, record)
+        return record_id
+
+    def _index_aliases(self, record_id, record):
+        for alias in record_aliases(record):
+            normalized = normalize_title(alias)
+            if not normalized:
+                continue
+            self.exact.setdefault(normalized, []).append(record_id)
+            alias_id = len(self.alias_shingles)
+            shingle_set = shingles(normalized)
+            self.alias_shingles.append((record_id, shingle_set, title_numbers(normalized)))
+            for key in self.hasher.band_keys(self.hasher.signature(shingle_set)):
+                self.buckets.setdefault(key, []).append(alias_id)
+
+    def compatible(self, a, b):
+        year_a, year_b = record_year(a), record_year(b)
+        if year_a and year_b and abs(year_a - year_b) > 1:
+            return False
+        type_a, type_b = record_type(a), record_type(b)
+        if type_a and type_b and type_a != type_b:
+            return False
+        episodes_a, episodes_b = record_episodes(a), record_episodes(b)
+        if episodes_a and episodes_b and episodes_a != episodes_b:
+            return False
+        return True
+
+    def find(self, record):
+        """Return the id of the best matching indexed record, or None"""
+        best_id, best_score = None, 0.0
+        for alias in record_aliases(record):
+            normalized = normalize_title(alias)
+            if not normalized:
+                continue
+
+            for record_id in self.exact.get(normalized, []):
+                if self.compatible(record, self.records[record_id]):
+                    return record_id
+
+            shingle_set = shingles(normalized)
+            numbers = title_numbers(normalized)
+            candidates = set()
+            for key in self.hasher.band_keys(self.hasher.signature(shingle_set)):
+                candidates.update(self.buckets.get(key, ()))
+
+            for alias_id in candidates:
+                record_id, other_shingles, other_numbers = self.alias_shingles[alias_id]
+                if numbers != other_numbers:
+                    continue
+                score = jaccard(shingle_set, other_shingles)
+                if score >= self.threshold and score > best_score and self.compatible(record, self.records[record_id]):
+                    best_id, best_score = record_id, score
+        return best_id
+
+    def merge(self, record_id, record):
+        """Merge another source's record into the indexed one.
+
+        The row from the preferred source (SOURCE_PRECEDENCE) is kept whichever
+        arrived first, so AniList-only columns survive a MAL row being indexed
+        before them; the other row only fills empty MERGED_FIELDS.
+        """
+        existing = self.records[record_id]
+        known_aliases = record_aliases(existing)
+        sources = list(existing.get('merged_from') or [existing.get('source')])
+        if record.get('source') not in sources:
+            sources.append(record.get('source'))
+
+        # Raw per-source scores of the same title, used to calibrate score scales
+        source_scores = dict(existing.get('source_scores') or {existing.get('source'): existing.get('viewer_reviews')})
+        source_scores.setdefault(record.get('source'), record.get('viewer_reviews'))
+
+        fill_from = record
+        if source_rank(record) < source_rank(existing):
+            # Same object stays in the index and the sink's list; only its contents are swapped
+            fill_from = dict(existing)
+            for field in list(existing):
+                del existing[field]
+            existing.update(record)
+
+        for field in MERGED_FIELDS:
+            if not existing.get(field) and fill_from.get(field):
+                existing[field] = fill_from[field]
+
+        new_aliases = [a for a in record_aliases(record) if a not in known_aliases]
+        existing['aliases'] = [a for a in dict.fromkeys(known_aliases + new_aliases) if a != existing.get('title')]
+        if new_aliases:
+            self._index_aliases(record_id, {'title': None, 'aliases': new_aliases})
+
+        existing['merged_from'] = sources
+        existing['source_scores'] = source_scores
+        return existing
+
+    def add_or_merge(self, record):
+        """Merge into a matching record if one exists, else add. Returns True if the record was new"""
+        record_id = self.find(record)
+        if record_id is None:
+            self.add(record)
+            return True
+        self.merge(record_id, record)
+        return False
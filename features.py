@@ -0,0 +1,124 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from score_normalization import ScoreNormalizer
+
+
+TEXT_COLUMNS = ['genre', 'studio', 'release_date', 'content_type']
+CATEGORICAL_COLUMNS = ['studio', 'content_type', 'source']
+
+RATING_BANDS = [
+    (9.0, 'Masterpiece (9.0+)'),
+    (8.0, 'Great (8.0-8.9)'),
+    (7.0, 'Good (7.0-7.9)'),
+    (6.0, 'Fine (6.0-6.9)'),
+    (5.0, 'Average (5.0-5.9)'),
+]
+RATING_DEFAULT = 'Poor (<5.0)'
+RATING_UNRATED = 'Unrated'
+RATING_CATEGORIES = [RATING_UNRATED, RATING_DEFAULT] + [label for _, label in reversed(RATING_BANDS)]
+
+
+def _fill_text(series, value='Unknown'):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.fillna(value)
+
+
+def clean_dataset(df, drop_missing_year=True):
+    """Fill missing values, cast numeric columns and derive release_year/month in one pass.
+
+    Works on both the string-only CSV and the typed Parquet dataset. Rows
+    without a usable release year are dropped, as in the notebook, unless
+    drop_missing_year is False (scoring must keep every candidate row).
+    """
+    df_clean = df.copy()
+
+    for column in TEXT_COLUMNS:
+        df_clean[column] = _fill_text(df_clean[column])
+
+    df_clean['number_of_episodes'] = (
+        pd.to_numeric(df_clean['number_of_episodes'], errors='coerce').fillna(0).astype(int)
+    )
+    df_clean['viewer_reviews'] = pd.to_numeric(df_clean['viewer_reviews'], errors='coerce').fillna(0)
+    # Calibrated 0-10 score; datasets scraped before calibration get the linear per-source rescale
+    if 'score' in df_clean:
+        df_clean['score'] = pd.to_numeric(df_clean['score'], errors='coerce').astype(float)
+    else:
+        df_clean['score'] = ScoreNormalizer().transform_frame(df_clean)
+
+    # release_date is "YYYY" or "YYYY-MM"; 'Unknown' coerces to NaN
+    date_parts = df_clean['release_date'].astype(str).str.split('-', n=1, expand=True)
+    df_clean['release_year'] = pd.to_numeric(date_parts[0], errors='coerce')
+    if 1 in date_parts:
+        df_clean['release_month'] = pd.to_numeric(date_parts[1], errors='coerce')
+    else:
+        df_clean['release_month'] = np.nan
+
+    valid_year = df_clean['release_year'].between(1000, 9999)
+    if drop_missing_year:
+        df_clean = df_clean[valid_year]
+    else:
+        df_clean['release_year'] = df_clean['release_year'].where(valid_year)
+    return df_clean.reset_index(drop=True)
+
+
+def rating_category(ratings):
+    """Vectorized equivalent of the notebook's categorize_rating on a 0-10 score (NaN is Unrated)"""
+    ratings = np.asarray(ratings, dtype=float)
+    conditions = [np.isnan(ratings)] + [ratings >= threshold for threshold, _ in RATING_BANDS]
+    labels = [RATING_UNRATED] + [label for _, label in RATING_BANDS]
+    bands = np.select(conditions, labels, default=RATING_DEFAULT)
+    return pd.Categorical(bands, categories=RATING_CATEGORIES, ordered=True)
+
+
+def add_features(df_clean):
+    """Add genre_count and rating_category (from the calibrated score) and convert
+    low-cardinality columns to categoricals"""
+    df_clean = df_clean.copy()
+
+    genre = df_clean['genre'].astype(str)
+    df_clean['genre_count'] = np.where(genre == 'Unknown', 0, genre.str.count(',') + 1)
+    df_clean['rating_category'] = rating_category(df_clean['score'])
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df_clean:
+            df_clean[column] = df_clean[column].astype('category')
+
+    return df_clean
+
+
+def prepare_dataset(df, drop_missing_year=True):
+    """clean_dataset followed by add_features"""
+    return add_features(clean_dataset(df, drop_missing_year=drop_missing_year))
+
+
+def prepare_records(data):
+    """Run the pipeline directly on scraped row dicts"""
+    return prepare_dataset(pd.DataFrame(data))
+
+
+def load_prepared_dataset(filename):
+    """Load a CSV or Parquet/Arrow dataset and run the pipeline on it"""
+    if filename.endswith('.csv'):
+        df = pd.read_csv(filename)
+    else:
+        from dataset_store import load_dataset
+        df = load_dataset(filename)
+    return prepare_dataset(df)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python features.py <input .csv/.parquet> <output .parquet>")
+        sys.exit(1)
+
+    df_clean = load_prepared_dataset(sys.argv[1])
+    df_clean.to_parquet(sys.argv[2], index=False)
+    print(f"✅ Prepared {len(df_clean)} rows saved to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import threading
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiter with adaptive backoff on 429s"""
+
+    def __init__(self, rate=1.0, capacity=None, min_rate=0.05):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.capacity = capacity if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, retry_after=None):
+        """Halve the rate and pause everyone after a rate-limit response"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0
+            return pause
+
+    def reward(self):
+        """Creep the rate back towards the configured value after a success"""
+        with self.lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+
+def parse_retry_after(response):
+    """Return the Retry-After header in seconds, if present and numeric"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class ConcurrentFetcher:
+    """Fetch pages through a bounded worker pool sharing one rate limiter.
+
+    With a telemetry.ScrapeTelemetry, every attempt's latency, size, status
+    and retry/cache flags are recorded against its host.
+    """
+
+    def __init__(self, session, requests_per_second=1.0, max_workers=4, max_retries=5, timeout=20,
+                 telemetry=None):
+        self.session = session
+        self.limiter = TokenBucket(requests_per_second)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.telemetry = telemetry
+
+    def fetch(self, url):
+        """GET a url, retrying 429s and transient errors. Returns None on failure"""
+        return self.request('GET', url)
+
+    def post(self, url, payload):
+        """POST a JSON payload with the same retry and rate-limit handling as fetch"""
+        return self.request('POST', url, json=payload)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the limiter, retrying 429s and transient errors.
+
+        Responses a CachedSession answers locally (fresh hits, offline replay
+        and misses) come back without taking a rate-limit token or retrying.
+        """
+        cached_response = getattr(self.session, 'cached_response', None)
+        if cached_response is not None:
+            start = time.perf_counter()
+            response = cached_response(method, url, **kwargs)
+            if response is not None:
+                if self.telemetry:
+                    self.telemetry.record_attempt(url, response.status_code, time.perf_counter() - start,
+                                                  len(response.content or b''), from_cache=True)
+                return response
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except Exception as e:
+                if self.telemetry:
+                    self.telemetry.record_attempt(url, None, time.perf_counter() - start, retry=attempt > 0)
+                print(f"  Error fetching {url}: {e}")
+                time.sleep(min(30, 2 ** attempt) + random.uniform(0, 1))
+                continue
+
+            if self.telemetry:
+                self.telemetry.record_attempt(url, response.status_code, time.perf_counter() - start,
+                                              len(response.content or b''), retry=attempt > 0,
+                                              from_cache=getattr(response, 'from_cache', False))
+
+            if response.status_code == 429:
+                pause = self.limiter.penalize(parse_retry_after(response))
+                print(f"  Rate limited on {url}, backing off {pause:.1f}s "
+                      f"(rate now {self.limiter.rate:.2f} req/s)")
+                continue
+            if response.status_code >= 500 and not getattr(response, 'from_cache', False):
+                time.sleep(min(30, 2 ** attempt) + random.uniform(0, 1))
+                continue
+
+            self.limiter.reward()
+            return response
+
+        print(f"  Giving up on {url} after {self.max_retries + 1} attempts")
+        if self.telemetry:
+            self.telemetry.record_give_up(url)
+        return None
+
+    def fetch_ordered(self, urls, fetch=None):
+        """Yield (url, response) in input order while keeping a bounded window in flight.
+
+        `fetch` defaults to a plain GET; pass another callable to map each item
+        through a different request. Closing the generator early cancels any
+        page that has not started yet.
+        """
+        fetch = fetch or self.fetch
+        urls = iter(urls)
+        window = self.max_workers * 2
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for url in urls:
+                    pending.append((url, executor.submit(fetch, url)))
+                    if len(pending) >= window:
+                        break
+
+                while pending:
+                    url, future = pending.popleft()
+                    response = future.result()
+                    next_url = next(urls, None)
+                    if next_url is not None:
+                        pending.append((next_url, executor.submit(fetch, next_url)))
+                    yield url, response
+            finally:
+                for _, future in pending:
+                    future.cancel()
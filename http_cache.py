@@ -0,0 +1,194 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache:
+    """Size-bounded, LRU-evicted on-disk store of HTTP responses (SQLite backed)"""
+
+    def __init__(self, path='http_cache.sqlite', max_bytes=500 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                stored_at REAL,
+                last_access REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)')
+        self.conn.commit()
+
+    def get(self, key):
+        """Return the cached entry as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT url, status, headers, body, stored_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        url, status, headers, body, stored_at = row
+        return {'url': url, 'status': status, 'headers': json.loads(headers),
+                'body': body, 'stored_at': stored_at}
+
+    def set(self, key, url, status, headers, body):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, status, json.dumps(dict(headers)), body, len(body), now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, key):
+        """Mark an entry as freshly validated (after a 304)"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute('UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?',
+                              (now, now, key))
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under budget
+        for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY last_access').fetchall():
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+
+
+def cache_key(method, url, json_body=None, params=None):
+    """GETs are keyed by URL (with any query params); JSON POSTs (GraphQL) by URL plus query and variables"""
+    if params:
+        url = requests.Request(method, url, params=params).prepare().url
+    if json_body is None:
+        return f"{method} {url}"
+    payload = json.dumps(json_body, sort_keys=True, separators=(',', ':'))
+    return f"{method} {url} {hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def is_offline_miss(response):
+    """True for the 504 an offline CachedSession answers a miss with; retrying cannot help"""
+    return response is not None and getattr(response, 'from_cache', False) and response.status_code == 504
+
+
+class CachedSession(requests.Session):
+    """requests.Session that serves GETs and JSON POSTs through a ResponseCache.
+
+    Fresh entries (younger than their TTL) are returned without touching the
+    network. Stale entries are revalidated with If-None-Match/If-Modified-Since
+    when the server sent an ETag or Last-Modified. In offline mode the cache is
+    replayed as-is and misses come back as 504 (the HTTP only-if-cached answer).
+    """
+
+    def __init__(self, cache, ttl=12 * 3600, ttl_overrides=None, offline=False):
+        super().__init__()
+        self.cache = cache
+        self.ttl = ttl
+        self.ttl_overrides = ttl_overrides or {}
+        self.offline = offline
+
+    def ttl_for(self, url):
+        for prefix, ttl in self.ttl_overrides.items():
+            if url.startswith(prefix):
+                return ttl
+        return self.ttl
+
+    def _cached_method(self, method, kwargs):
+        return method in ('GET', 'POST') and not (method == 'POST' and 'json' not in kwargs)
+
+    def _local_response(self, url, entry):
+        """The answer that needs no network: a fresh entry, or anything in offline mode"""
+        if self.offline:
+            if entry is None:
+                return self._build_response(url, 504, {}, b'', from_cache=True)
+            return self._from_entry(entry)
+        if entry is not None and time.time() - entry['stored_at'] < self.ttl_for(url):
+            return self._from_entry(entry)
+        return None
+
+    def cached_response(self, method, url, **kwargs):
+        """What request() would answer from the cache alone, or None when it has to go to the network.
+
+        Lets a rate-limited caller skip its limiter for requests that never
+        reach the server.
+        """
+        method = method.upper()
+        if not self._cached_method(method, kwargs):
+            return None
+        entry = self.cache.get(cache_key(method, url, kwargs.get('json'), kwargs.get('params')))
+        return self._local_response(url, entry)
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        if not self._cached_method(method, kwargs):
+            return super().request(method, url, **kwargs)
+
+        key = cache_key(method, url, kwargs.get('json'), kwargs.get('params'))
+        entry = self.cache.get(key)
+        local = self._local_response(url, entry)
+        if local is not None:
+            return local
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            cached_headers = CaseInsensitiveDict(entry['headers'])
+            if cached_headers.get('ETag'):
+                headers['If-None-Match'] = cached_headers['ETag']
+            if cached_headers.get('Last-Modified'):
+                headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+        response = super().request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(key)
+            return self._from_entry(entry)
+
+        if self._cacheable(method, response):
+            self.cache.set(key, url, response.status_code, response.headers, response.content)
+        response.from_cache = False
+        return response
+
+    def _cacheable(self, method, response):
+        if response.status_code != 200:
+            return False
+        # GraphQL reports failures inside a 200 body; never pin those
+        return not (method == 'POST' and b'"errors"' in response.content)
+
+    def _from_entry(self, entry):
+        return self._build_response(entry['url'], entry['status'], entry['headers'], entry['body'],
+                                    from_cache=True)
+
+    def _build_response(self, url, status, headers, body, from_cache):
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = from_cache
+        return response
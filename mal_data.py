@@ -1,22 +1,55 @@
 import requests
-from bs4 import BeautifulSoup
 import csv
 import time
 import random
 from urllib.parse import urljoin
-import re
 import json
+import argparse
+import os
+from fetcher import ConcurrentFetcher
+from checkpoint import ScrapeCheckpoint
+from http_cache import ResponseCache, CachedSession, is_offline_miss
+from dataset_store import save_to_parquet, read_csv_records, csv_row, CSV_FIELDNAMES, StreamingDatasetWriter
+from sources import Source, DatasetSink, StreamingSink, SourceRunner
+from score_normalization import ScoreNormalizer
+from mal_enrichment import EnrichmentCache, MalEnricher
+from anilist_query import AniListQuery, DEFAULT_FIELDS, ANILIST_COLUMNS, UPDATED_SINCE_QUERY
+from mal_parser import parse_mal_ranking_page, extract_bs4_row, default_backend
+from records import AnimeRecord
+from mal_sweep import MalCategorySweepSource, MAL_CATEGORIES
+from telemetry import ScrapeTelemetry, serve_metrics
+from anime_store import AnimeStore
+from snapshots import SnapshotStore
 
 class AlternativeAnimeScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, cache_path=None, cache_ttl=12 * 3600, offline=False, parser_backend=None):
+        self.parser_backend = parser_backend or default_backend()
+        self.score_normalizer = ScoreNormalizer()  # Linear until a combined scrape fits it
+        self.anilist_watermark = None  # Newest AniList updatedAt a complete --refresh sweep reached
+        self.source_failures = {}  # Source name -> error from the last scrape_combined_sources run
+        self.telemetry = ScrapeTelemetry()  # Shared by every fetcher this scraper creates
+        if cache_path:
+            # Anything fetched through self.session (MAL pages, AniList POSTs) is cached
+            cache = ResponseCache(cache_path)
+            self.session = CachedSession(cache, ttl=cache_ttl, offline=offline)
+        else:
+            self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         })
     
-    def scrape_myanimelist_enhanced(self, target_count=5000):
+    def scrape_myanimelist_enhanced(self, target_count=5000, requests_per_second=1.0, max_workers=4,
+                                    checkpoint=None):
         """Enhanced MyAnimeList scraper to get exactly 5000 anime"""
         all_anime_data = []
+        for batch in self.iter_myanimelist_batches(target_count, requests_per_second, max_workers, checkpoint):
+            all_anime_data.extend(batch)
+        return all_anime_data
+    
+    def iter_myanimelist_batches(self, target_count=5000, requests_per_second=1.0, max_workers=4,
+                                 checkpoint=None):
+        """Yield each ranking page's new unique records, in rank order"""
+        collected = 0  # Only a count is kept; batches are handed on as they arrive
         seen_titles = set()  # Avoid duplicates
         base_url = "https://myanimelist.net/topanime.php"
         
@@ -24,323 +57,484 @@ class AlternativeAnimeScraper:
         pages_needed = (target_count // 50) + 1
         
         print(f"Targeting {target_count} anime from MyAnimeList...")
-        print(f"Will scrape {pages_needed} pages (50 anime per page)")
+        print(f"Will scrape {pages_needed} pages (50 anime per page) "
+              f"with {max_workers} workers at {requests_per_second} req/s")
         
         consecutive_failures = 0
         max_failures = 10
         
-        for page in range(0, pages_needed):
-            if len(all_anime_data) >= target_count:
-                print(f"Reached target of {target_count} anime!")
-                break
-                
-            limit = page * 50
-            url = f"{base_url}?limit={limit}"
-            
-            print(f"Scraping page {page + 1}/{pages_needed}: offset {limit}")
-            
-            try:
-                # Random delay between 2-6 seconds to avoid rate limiting
-                time.sleep(random.uniform(2, 6))
-                
-                response = self.session.get(url, timeout=20)
-                
-                if response.status_code == 429:  # Rate limited
-                    wait_time = 60 + random.uniform(10, 30)
-                    print(f"  Rate limited, waiting {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                elif response.status_code != 200:
-                    print(f"  Status code: {response.status_code}, skipping...")
-                    consecutive_failures += 1
-                    if consecutive_failures >= max_failures:
-                        print("Too many consecutive failures, stopping...")
-                        break
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                anime_rows = soup.find_all('tr', class_='ranking-list')
+        fetcher = ConcurrentFetcher(self.session, requests_per_second=requests_per_second,
+                                    max_workers=max_workers, telemetry=self.telemetry)
+        
+        def fetch_page(limit):
+            if checkpoint and checkpoint.is_done('MyAnimeList', limit):
+                return None  # Replayed from the journal, no request needed
+            return fetcher.fetch(f"{base_url}?limit={limit}")
+        
+        offsets = [page * 50 for page in range(0, pages_needed)]
+        pages = fetcher.fetch_ordered(offsets, fetch=fetch_page)
+        
+        # Pages arrive in rank order even though they are fetched concurrently
+        try:
+            for page, (limit, response) in enumerate(pages):
+                if collected >= target_count:
+                    print(f"Reached target of {target_count} anime!")
+                    break
                 
-                if not anime_rows:
-                    print(f"  No anime found on page {page + 1}")
+                try:
+                    if checkpoint and checkpoint.is_done('MyAnimeList', limit):
+                        page_records = [AnimeRecord.from_dict(r) for r in checkpoint.records('MyAnimeList', limit)]
+                        print(f"Replaying page {page + 1}/{pages_needed} from checkpoint: offset {limit}")
+                        batch = self.unique_records(page_records, seen_titles, target_count - collected)
+                        collected += len(batch)
+                        print(f"  Found {len(batch)} new anime. Total unique: {collected}")
+                        if batch:
+                            yield batch
+                        continue
+                    
+                    print(f"Scraping page {page + 1}/{pages_needed}: offset {limit}")
+                    
+                    if response is None or response.status_code != 200:
+                        status = response.status_code if response is not None else 'no response'
+                        print(f"  Status code: {status}, skipping...")
+                        consecutive_failures += 1
+                        if consecutive_failures >= max_failures:
+                            print("Too many consecutive failures, stopping...")
+                            break
+                        continue
+                    
+                    parse_start = time.perf_counter()
+                    page_records = parse_mal_ranking_page(response.content, self.parser_backend)
+                    self.telemetry.record_parse('MyAnimeList', time.perf_counter() - parse_start, len(page_records))
+                    
+                    if not page_records:
+                        print(f"  No anime found on page {page + 1}")
+                        consecutive_failures += 1
+                        if consecutive_failures >= max_failures:
+                            print("No more anime found, stopping...")
+                            break
+                        continue
+                    
+                    consecutive_failures = 0  # Reset failure count
+                    
+                    if checkpoint:
+                        checkpoint.record_page('MyAnimeList', limit, page_records)
+                    
+                    batch = self.unique_records(page_records, seen_titles, target_count - collected)
+                    collected += len(batch)
+                    print(f"  Found {len(batch)} new anime. Total unique: {collected}")
+                    if batch:
+                        yield batch
+                    
+                except Exception as e:
+                    print(f"  Error on page {page + 1}: {e}")
                     consecutive_failures += 1
                     if consecutive_failures >= max_failures:
-                        print("No more anime found, stopping...")
+                        print("Too many errors, stopping...")
                         break
                     continue
-                
-                consecutive_failures = 0  # Reset failure count
-                page_count = 0
-                
-                for row in anime_rows:
-                    try:
-                        anime_data = self.extract_mal_anime_data(row)
-                        
-                        if anime_data['title'] and anime_data['title'] not in seen_titles:
-                            seen_titles.add(anime_data['title'])
-                            all_anime_data.append(anime_data)
-                            page_count += 1
-                            
-                            if len(all_anime_data) >= target_count:
-                                break
-                                
-                    except Exception as e:
-                        print(f"    Error extracting anime: {e}")
-                        continue
-                
-                print(f"  Found {page_count} new anime. Total unique: {len(all_anime_data)}")
-                
-            except Exception as e:
-                print(f"  Error on page {page + 1}: {e}")
-                consecutive_failures += 1
-                if consecutive_failures >= max_failures:
-                    print("Too many errors, stopping...")
-                    break
-                time.sleep(15)  # Longer wait on error
-                continue
+        finally:
+            pages.close()  # Cancel any prefetched pages we no longer need
         
-        print(f"\nScraping complete! Got {len(all_anime_data)} anime from MyAnimeList")
-        return all_anime_data[:target_count]  # Ensure exact count
+        print(f"\nScraping complete! Got {collected} anime from MyAnimeList")
     
-    def scrape_anilist_api_enhanced(self, target_count=5000):
-        """Enhanced AniList GraphQL API scraper to get 5000 anime"""
+    def scrape_anilist_api_enhanced(self, target_count=5000, requests_per_second=1.4, max_workers=3,
+                                    checkpoint=None, fields=DEFAULT_FIELDS):
+        """Enhanced AniList GraphQL API scraper to get 5000 anime
+
+        `fields` picks the extra feature groups (see anilist_query.ANILIST_FIELDS)
+        fetched in the same query as the base row.
+        """
+        all_anime_data = []
+        for batch in self.iter_anilist_batches(target_count, requests_per_second, max_workers, checkpoint, fields):
+            all_anime_data.extend(batch)
+        return all_anime_data
+    
+    def iter_anilist_batches(self, target_count=5000, requests_per_second=1.4, max_workers=3,
+                             checkpoint=None, fields=DEFAULT_FIELDS):
+        """Yield each AniList page's new unique records, in popularity order"""
         url = 'https://graphql.anilist.co'
         
-        query = '''
-        query ($page: Int, $perPage: Int) {
-            Page(page: $page, perPage: $perPage) {
-                pageInfo {
-                    hasNextPage
-                    total
-                    currentPage
-                }
-                media(type: ANIME, sort: POPULARITY_DESC) {
-                    title {
-                        romaji
-                        english
-                        native
-                    }
-                    genres
-                    studios {
-                        nodes {
-                            name
-                        }
-                    }
-                    episodes
-                    startDate {
-                        year
-                        month
-                    }
-                    format
-                    averageScore
-                    meanScore
-                    status
-                    season
-                    seasonYear
-                }
-            }
-        }
-        '''
+        selection = AniListQuery(fields)
+        query = selection.build()
         
-        all_anime_data = []
+        collected = 0
         seen_titles = set()
         per_page = 50  # Maximum allowed by AniList
         pages_needed = (target_count // per_page) + 1
         
         print(f"Fetching {target_count} anime from AniList API...")
-        print(f"Will fetch {pages_needed} pages ({per_page} anime per page)")
         
-        for page in range(1, pages_needed + 1):
-            if len(all_anime_data) >= target_count:
-                print(f"Reached target of {target_count} anime!")
-                break
-                
-            variables = {
-                'page': page,
-                'perPage': per_page
-            }
+        # Rate limiting - AniList allows ~90 requests per minute, shared by all workers
+        fetcher = ConcurrentFetcher(self.session, requests_per_second=requests_per_second,
+                                    max_workers=max_workers, timeout=15, telemetry=self.telemetry)
+        
+        def fetch_page(page):
+            """Return {'pageInfo', 'records'} for a page, from the journal when possible"""
+            if checkpoint and checkpoint.is_done('AniList', page):
+                return {'pageInfo': checkpoint.page_info('AniList', page),
+                        'records': [AnimeRecord.from_dict(r) for r in checkpoint.records('AniList', page)]}
             
-            print(f"Fetching page {page}/{pages_needed}...")
+            page_data = self.fetch_anilist_page(fetcher, url, query, page, per_page)
+            if page_data is None:
+                return None
             
-            try:
-                response = requests.post(url, json={'query': query, 'variables': variables}, timeout=15)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if 'errors' in data:
-                    print(f"  GraphQL errors: {data['errors']}")
-                    time.sleep(5)
-                    continue
+            parse_start = time.perf_counter()
+            records = []
+            for anime in page_data['media']:
+                try:
+                    records.append(self.map_anilist_media(anime, selection))
+                except Exception as e:
+                    print(f"    Error processing anime: {e}")
+            self.telemetry.record_parse('AniList', time.perf_counter() - parse_start, len(records))
+            return {'pageInfo': page_data['pageInfo'], 'records': records}
+        
+        # The first page tells us how many pages exist, so the rest can be planned up front
+        print(f"Fetching page 1/{pages_needed}...")
+        first_page = fetch_page(1)
+        if first_page is None:
+            print(f"\nAniList scraping complete! Got 0 anime")
+            return
+        
+        total = first_page['pageInfo'].get('total') or 0
+        if total:
+            pages_needed = min(pages_needed, -(-total // per_page))
+        print(f"Will fetch {pages_needed} pages ({per_page} anime per page) "
+              f"with {max_workers} workers at {requests_per_second} req/s")
+        
+        def pages_in_order():
+            yield 1, first_page
+            yield from fetcher.fetch_ordered(range(2, pages_needed + 1), fetch=fetch_page)
+        
+        pages = pages_in_order()
+        try:
+            for page, page_data in pages:
+                if collected >= target_count:
+                    print(f"Reached target of {target_count} anime!")
+                    break
                 
-                if 'data' not in data or 'Page' not in data['data']:
-                    print(f"  Invalid response structure")
+                if page_data is None:
+                    print(f"  Page {page} failed after retries, skipping")
                     continue
                 
-                page_data = data['data']['Page']
-                
-                if not page_data['media']:
+                if not page_data['records']:
                     print(f"  No media found on page {page}")
                     break
                 
-                page_count = 0
-                for anime in page_data['media']:
-                    try:
-                        # Use the best available title
-                        title = (anime['title']['english'] or 
-                                anime['title']['romaji'] or 
-                                anime['title']['native'] or 
-                                'Unknown Title')
-                        
-                        if title in seen_titles:
-                            continue  # Skip duplicates
-                        
-                        seen_titles.add(title)
-                        
-                        # Format release date
-                        release_date = ''
-                        if anime['startDate'] and anime['startDate']['year']:
-                            release_date = str(anime['startDate']['year'])
-                            if anime['startDate']['month']:
-                                release_date += f"-{anime['startDate']['month']:02d}"
-                        
-                        # Clean up content type
-                        content_type = anime['format'] if anime['format'] else 'Unknown'
-                        if content_type:
-                            content_type = content_type.replace('_', ' ').title()
-                        
-                        anime_data = {
-                            'title': title,
-                            'genre': ', '.join(anime['genres']) if anime['genres'] else '',
-                            'studio': anime['studios']['nodes'][0]['name'] if anime['studios']['nodes'] else '',
-                            'number_of_episodes': str(anime['episodes']) if anime['episodes'] else '',
-                            'release_date': release_date,
-                            'content_type': content_type,
-                            'viewer_reviews': str(anime['averageScore']) if anime['averageScore'] else '',
-                            'source': 'AniList'
-                        }
-                        
-                        all_anime_data.append(anime_data)
-                        page_count += 1
-                        
-                        if len(all_anime_data) >= target_count:
-                            break
-                            
-                    except Exception as e:
-                        print(f"    Error processing anime: {e}")
-                        continue
+                if checkpoint:
+                    checkpoint.record_page('AniList', page, page_data['records'], page_data['pageInfo'])
                 
-                print(f"  Added {page_count} new anime. Total: {len(all_anime_data)}")
+                batch = self.unique_records(page_data['records'], seen_titles, target_count - collected)
+                collected += len(batch)
+                print(f"  Page {page}: added {len(batch)} new anime. Total: {collected}")
+                if batch:
+                    yield batch
                 
                 # Check if there's a next page
-                if not page_data['pageInfo']['hasNextPage']:
+                if not page_data['pageInfo'].get('hasNextPage'):
                     print("  Reached last page")
                     break
-                
-                # Rate limiting - AniList allows ~90 requests per minute
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"  Error with AniList API page {page}: {e}")
-                time.sleep(5)
-                continue
+        finally:
+            pages.close()  # Cancel any prefetched pages we no longer need
         
-        print(f"\nAniList scraping complete! Got {len(all_anime_data)} anime")
-        return all_anime_data[:target_count]  # Ensure exact count
+        print(f"\nAniList scraping complete! Got {collected} anime")
     
-    def scrape_combined_sources(self, target_count=5000):
-        """Combine multiple sources to get 5000 anime"""
-        all_anime_data = []
-        seen_titles = set()
-        
-        print(f"Combining multiple sources to get {target_count} anime...")
+    def fetch_anilist_page(self, fetcher, url, query, page, per_page, max_attempts=4, variables=None):
+        """Fetch one AniList Page, retrying GraphQL errors with backoff. Returns None on failure
+
+        HTTP-level retries (429s, 5xx, connection errors) are the fetcher's job:
+        a missing response or a non-200 status is final. Only a 200 whose body
+        carries GraphQL errors or is malformed is tried again here.
+        """
+        variables = {
+            'page': page,
+            'perPage': per_page,
+            **(variables or {})
+        }
         
-        # First, get data from AniList (faster and more reliable)
-        print("\n1. Fetching from AniList API...")
-        try:
-            anilist_data = self.scrape_anilist_api_enhanced(target_count // 2)  # Get half from AniList
-            for anime in anilist_data:
-                if anime['title'] not in seen_titles:
-                    seen_titles.add(anime['title'])
-                    all_anime_data.append(anime)
-            print(f"Got {len(anilist_data)} anime from AniList")
-        except Exception as e:
-            print(f"AniList failed: {e}")
-        
-        # If we still need more, get from MyAnimeList
-        remaining_needed = target_count - len(all_anime_data)
-        if remaining_needed > 0:
-            print(f"\n2. Need {remaining_needed} more anime, fetching from MyAnimeList...")
+        for attempt in range(max_attempts):
+            response = fetcher.post(url, {'query': query, 'variables': variables})
+            if is_offline_miss(response):
+                print(f"  AniList page {page} is not in the cache (offline)")
+                return None
+            if response is None:
+                return None  # The fetcher already retried and gave up
+            if response.status_code != 200:
+                print(f"  AniList API page {page} failed with HTTP {response.status_code}")
+                return None
+            
             try:
-                mal_data = self.scrape_myanimelist_enhanced(remaining_needed + 500)  # Get extra to account for duplicates
+                data = response.json()
                 
-                added_count = 0
-                for anime in mal_data:
-                    if anime['title'] not in seen_titles and len(all_anime_data) < target_count:
-                        seen_titles.add(anime['title'])
-                        all_anime_data.append(anime)
-                        added_count += 1
+                if 'errors' in data:
+                    raise ValueError(f"GraphQL errors: {data['errors']}")
+                
+                if 'data' not in data or 'Page' not in data['data']:
+                    raise ValueError("Invalid response structure")
+                
+                return data['data']['Page']
                 
-                print(f"Added {added_count} new anime from MyAnimeList")
             except Exception as e:
-                print(f"MyAnimeList failed: {e}")
+                if attempt == max_attempts - 1:
+                    print(f"  Error with AniList API page {page}: {e}; giving up")
+                    break
+                wait_time = 2 ** attempt + random.uniform(0, 1)
+                print(f"  Error with AniList API page {page}: {e}; retrying in {wait_time:.1f}s")
+                time.sleep(wait_time)
         
-        print(f"\nTotal anime collected: {len(all_anime_data)}")
-        return all_anime_data[:target_count]  # Ensure exact count
+        return None
     
-    def extract_mal_anime_data(self, row):
-        """Extract anime data from a MAL row element"""
-        anime_data = {
-            'title': '',
-            'genre': '',
-            'studio': '',
-            'number_of_episodes': '',
-            'release_date': '',
-            'content_type': '',
-            'viewer_reviews': '',
-            'source': 'MyAnimeList'
-        }
-        
-        # Extract title
-        title_elem = row.find('a', class_='hoverinfo_trigger')
-        if title_elem:
-            anime_data['title'] = title_elem.get_text(strip=True)
+    def find_changed_anilist_ids(self, fetcher, known, watermark=None, max_pages=200):
+        """IDs from `known` ({anilist_id: updated_at or None}) whose AniList entry changed since.
+
+        Walks the most recently updated entries (id and updatedAt only) down to
+        `watermark`, the newest updatedAt a previous complete sweep reached
+        (the newest updated_at we hold when there is none); anything edited
+        after that shows up in the sweep. IDs with no recorded updated_at are
+        always included.
+
+        Returns (changed IDs, new watermark). The new watermark is None when the
+        sweep stopped at max_pages before reaching the old one.
+        """
+        url = 'https://graphql.anilist.co'
+        changed = {anilist_id for anilist_id, updated_at in known.items() if updated_at is None}
+        tracked = [updated_at for updated_at in known.values() if updated_at is not None]
+        if watermark is None:
+            if not tracked:
+                return changed, None
+            watermark = max(tracked)
         
-        # Extract additional info
-        info_elem = row.find('div', class_='information')
-        if info_elem:
-            info_text = info_elem.get_text()
+        newest = watermark
+        for page in range(1, max_pages + 1):
+            page_data = self.fetch_anilist_page(fetcher, url, UPDATED_SINCE_QUERY, page, 50)
+            if page_data is None:
+                raise RuntimeError(f"AniList updatedAt sweep failed on page {page}")
             
-            # Extract episodes
-            ep_match = re.search(r'(\d+) eps', info_text)
-            if ep_match:
-                anime_data['number_of_episodes'] = ep_match.group(1)
-            elif 'Movie' in info_text:
-                anime_data['number_of_episodes'] = '1'
+            media = page_data['media']
+            for anime in media:
+                newest = max(newest, anime['updatedAt'])
+                known_updated_at = known.get(anime['id'])
+                if known_updated_at is not None and anime['updatedAt'] > known_updated_at:
+                    changed.add(anime['id'])
             
-            # Extract year
-            year_match = re.search(r'(19|20)\d{2}', info_text)
-            if year_match:
-                anime_data['release_date'] = year_match.group(0)
-            
-            # Content type
-            if 'TV' in info_text:
-                anime_data['content_type'] = 'TV Series'
-            elif 'Movie' in info_text:
-                anime_data['content_type'] = 'Movie'
-            elif 'OVA' in info_text:
-                anime_data['content_type'] = 'OVA'
-            elif 'Special' in info_text:
-                anime_data['content_type'] = 'Special'
-            else:
-                anime_data['content_type'] = 'TV Series'  # Default
+            if not media or media[-1]['updatedAt'] < watermark or not page_data['pageInfo'].get('hasNextPage'):
+                return changed, newest
         
-        # Extract score
-        score_elem = row.find('span', class_='text')
-        if score_elem:
-            anime_data['viewer_reviews'] = score_elem.get_text(strip=True)
+        print(f"  ⚠️  updatedAt sweep hit the {max_pages}-page cap before reaching the last watermark; "
+              f"older edits were not checked and the watermark stays put")
+        return changed, None
+    
+    def refresh_anilist_records(self, records, requests_per_second=1.4, max_workers=3, batch_size=50,
+                                fields=DEFAULT_FIELDS, watermark=None):
+        """Re-fetch, in place, the AniList rows whose entry changed since they were scraped.
+
+        Instead of re-walking the popularity-sorted pages from page 1, changed
+        titles are found with a cheap updatedAt sweep and then fetched by ID,
+        batch_size (at most 50, AniList's page size) per request. Returns the
+        updated rows.
+
+        `watermark` is the one a previous refresh left in self.anilist_watermark.
+        It only advances when the sweep was complete and every batch was
+        fetched, so titles in a failed batch are found again next refresh.
+        """
+        self.anilist_watermark = watermark
+        url = 'https://graphql.anilist.co'
+        by_id = {}
+        for record in records:
+            if record.get('source') == 'AniList' and record.get('anilist_id'):
+                by_id[int(record['anilist_id'])] = record
+        if not by_id:
+            print("No AniList IDs to refresh (dataset predates anilist_id tracking)")
+            return []
+        
+        known = {}
+        for anilist_id, record in by_id.items():
+            updated_at = record.get('updated_at')
+            known[anilist_id] = int(updated_at) if updated_at not in (None, '') else None
         
-        return anime_data
+        fetcher = ConcurrentFetcher(self.session, requests_per_second=requests_per_second,
+                                    max_workers=max_workers, timeout=15, telemetry=self.telemetry)
+        changed, sweep_watermark = self.find_changed_anilist_ids(fetcher, known, watermark)
+        changed = sorted(changed)
+        print(f"{len(changed)} of {len(by_id)} AniList titles changed since the last scrape")
+        
+        selection = AniListQuery(fields)
+        query = selection.build_by_ids()
+        batch_size = min(batch_size, 50)
+        batches = [changed[i:i + batch_size] for i in range(0, len(changed), batch_size)]
+        
+        def fetch_batch(ids):
+            return self.fetch_anilist_page(fetcher, url, query, 1, len(ids), variables={'ids': ids})
+        
+        updated = []
+        failed_batches = 0
+        for ids, page_data in fetcher.fetch_ordered(batches, fetch=fetch_batch):
+            if page_data is None:
+                failed_batches += 1
+                print(f"  Batch of {len(ids)} IDs failed after retries; they are retried next refresh")
+                continue
+            for anime in page_data['media']:
+                record = by_id.get(anime['id'])
+                if record is None:
+                    continue
+                try:
+                    fresh = self.map_anilist_media(anime, selection)
+                except Exception as e:
+                    print(f"    Error processing anime: {e}")
+                    continue
+                fresh.pop('aliases', None)
+                record.update(fresh)
+                updated.append(record)
+        
+        if sweep_watermark is not None and not failed_batches:
+            self.anilist_watermark = sweep_watermark
+        
+        # Raw AniList scores changed, so their calibrated score must follow
+        self.score_normalizer.apply(updated)
+        print(f"Refreshed {len(updated)} AniList titles in {len(batches)} batched requests")
+        return updated
+    
+    def map_anilist_media(self, anime, selection=None):
+        """Convert an AniList media node into an AnimeRecord, plus the selection's typed columns"""
+        # Use the best available title
+        title = (anime['title']['english'] or 
+                anime['title']['romaji'] or 
+                anime['title']['native'] or 
+                'Unknown Title')
+        
+        # Format release date
+        release_date = ''
+        if anime['startDate'] and anime['startDate']['year']:
+            release_date = str(anime['startDate']['year'])
+            if anime['startDate']['month']:
+                release_date += f"-{anime['startDate']['month']:02d}"
+        
+        # Clean up content type
+        content_type = anime['format'] if anime['format'] else 'Unknown'
+        if content_type:
+            content_type = content_type.replace('_', ' ').title()
+        
+        row = {
+            'title': title,
+            'genre': ', '.join(anime['genres']) if anime['genres'] else '',
+            'studio': ', '.join(node['name'] for node in anime['studios']['nodes']),
+            'number_of_episodes': anime['episodes'] or None,
+            'release_date': release_date,
+            'content_type': content_type,
+            'viewer_reviews': anime['averageScore'] or None,
+            'source': 'AniList',
+            # Every title form, so other sources can be matched against romaji or native names
+            'aliases': [t for t in (anime['title']['romaji'], anime['title']['english'],
+                                    anime['title']['native']) if t and t != title],
+            'anilist_id': anime.get('id')
+        }
+        if selection is not None:
+            row.update(selection.map_fields(anime))
+        return AnimeRecord.from_dict(row)
+    
+    def scrape_combined_sources(self, target_count=5000, checkpoint=None, mal_categories=None):
+        """Combine multiple sources to get 5000 anime
+
+        AniList and MyAnimeList are scraped concurrently and streamed into one
+        DatasetSink. Half the target is reserved for AniList (the richer
+        source); MAL fills the rest, and everything if AniList fails.
+
+        With a checkpoint, every page is journaled as it arrives and a rerun
+        replays completed pages (rebuilding seen_titles) instead of refetching.
+        Sources that failed are left in self.source_failures.
+        
+        Records are resolved across sources with an EntityIndex, so a MAL row
+        for "Shingeki no Kyojin" and AniList's "Attack on Titan" end up as one
+        anime. The AniList row is kept whichever source delivers it first; MAL
+        only fills the fields it leaves empty.
+
+        With mal_categories, MAL is swept across those ranking categories
+        (see mal_sweep.MalCategorySweepSource) instead of the plain ranking.
+        """
+        print(f"Combining multiple sources to get {target_count} anime...")
+        
+        sources = [
+            AniListSource(self, target_count // 2, checkpoint=checkpoint),
+            mal_source(self, target_count + 500, checkpoint, mal_categories),
+        ]
+        sink = DatasetSink(target_count, reserved={'AniList': target_count // 2})
+        runner = SourceRunner(sources, sink)
+        all_anime_data = runner.run()
+        self.score_normalizer = sink.score_normalizer
+        self.source_failures = runner.failures
+        
+        print(f"\nTotal anime collected: {len(all_anime_data)}")
+        return all_anime_data
+    
+    def unique_records(self, records, seen_titles, limit):
+        """Records with unseen titles, at most limit of them"""
+        unique = []
+        for anime_data in records:
+            if len(unique) >= limit:
+                break
+            if anime_data['title'] and anime_data['title'] not in seen_titles:
+                seen_titles.add(anime_data['title'])
+                unique.append(anime_data)
+        return unique
+    
+    def mal_enricher(self, source='jikan', cache_path='mal_enrichment.sqlite', ttl=7 * 24 * 3600):
+        """A MalEnricher sharing this scraper's session and telemetry; close() it when the run is done"""
+        return MalEnricher(self.session, EnrichmentCache(cache_path), ttl=ttl, source=source,
+                           telemetry=self.telemetry)
+    
+    def enrich_mal_records(self, records, source='jikan', cache_path='mal_enrichment.sqlite',
+                           ttl=7 * 24 * 3600):
+        """Fill the genre and studio MAL's ranking page leaves empty, from each title's detail page.
+
+        One-off; a run enriching batch after batch should keep one mal_enricher() instead.
+        """
+        enricher = self.mal_enricher(source, cache_path, ttl)
+        try:
+            return enricher.enrich(records)
+        finally:
+            enricher.close()
+    
+    def extract_mal_anime_data(self, row):
+        """Extract anime data from a MAL row element"""
+        return extract_bs4_row(row)
+
+class MalRankingSource(Source):
+    """MyAnimeList topanime.php ranking pages"""
+    
+    name = 'MyAnimeList'
+    
+    def __init__(self, scraper, target_count=5000, checkpoint=None, **fetch_options):
+        self.scraper = scraper
+        self.target_count = target_count
+        self.checkpoint = checkpoint
+        self.fetch_options = fetch_options
+    
+    def iter_batches(self):
+        return self.scraper.iter_myanimelist_batches(self.target_count, checkpoint=self.checkpoint,
+                                                     **self.fetch_options)
+
+
+class AniListSource(Source):
+    """AniList GraphQL Page query, most popular first"""
+    
+    name = 'AniList'
+    
+    def __init__(self, scraper, target_count=5000, checkpoint=None, **fetch_options):
+        self.scraper = scraper
+        self.target_count = target_count
+        self.checkpoint = checkpoint
+        self.fetch_options = fetch_options
+    
+    def iter_batches(self):
+        return self.scraper.iter_anilist_batches(self.target_count, checkpoint=self.checkpoint,
+                                                 **self.fetch_options)
+
+
+def mal_source(scraper, target_count, checkpoint=None, categories=None):
+    """The plain MAL ranking, or a multi-category sweep when categories are given"""
+    if categories:
+        return MalCategorySweepSource(scraper, target_count, checkpoint=checkpoint, categories=categories)
+    return MalRankingSource(scraper, target_count, checkpoint=checkpoint)
 
 def save_to_csv(data, filename):
     """Save data to CSV file"""
@@ -348,22 +542,35 @@ def save_to_csv(data, filename):
         print("No data to save!")
         return
     
-    fieldnames = ['title', 'genre', 'studio', 'number_of_episodes', 
-                 'release_date', 'content_type', 'viewer_reviews', 'source']
+    # AniList popularity signals, when the scrape selected them
+    fieldnames = CSV_FIELDNAMES + [column for column in ANILIST_COLUMNS if any(column in anime for anime in data)]
     
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
         
         for anime in data:
-            cleaned_anime = {}
-            for key, value in anime.items():
-                if key in fieldnames:
-                    cleaned_anime[key] = str(value).strip() if value else ''
-            writer.writerow(cleaned_anime)
+            writer.writerow(csv_row(anime, fieldnames))
     
     print(f"✅ Data saved to {filename}")
 
+def load_watermark(filename, dataset):
+    """The AniList updatedAt watermark the last complete refresh of `dataset` reached, or None"""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, encoding='utf-8') as f:
+        return json.load(f).get(dataset)
+
+def save_watermark(filename, dataset, watermark):
+    """Record `dataset`'s refresh watermark, keeping the other datasets' entries"""
+    watermarks = {}
+    if os.path.exists(filename):
+        with open(filename, encoding='utf-8') as f:
+            watermarks = json.load(f)
+    watermarks[dataset] = watermark
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+
 def display_sample_data(data, source_name):
     """Display sample scraped data"""
     if not data:
@@ -384,51 +591,145 @@ def display_sample_data(data, source_name):
         print(f"   🔗 Source: {anime.get('source', 'N/A')}")
 
 def main():
-    print("🎌 Enhanced Anime Scraper - Targeting 5000 Anime")
+    parser = argparse.ArgumentParser(description="Scrape 5000 anime from AniList and MyAnimeList")
+    parser.add_argument('--cache', default='http_cache.sqlite', help="on-disk HTTP response cache ('' to disable)")
+    parser.add_argument('--offline', action='store_true', help="replay cached responses without network access")
+    parser.add_argument('--enrich', choices=['jikan', 'html', 'none'], default='jikan',
+                        help="where to fetch MAL genres/studios from (detail pages are cached per ID)")
+    parser.add_argument('--enrichment-cache', default='mal_enrichment.sqlite')
+    parser.add_argument('--enrichment-ttl-days', type=float, default=7)
+    parser.add_argument('--target', type=int, default=5000, help="number of anime to collect")
+    parser.add_argument('--stream', action='store_true',
+                        help="write pages to disk as they arrive instead of holding the dataset in memory")
+    parser.add_argument('--refresh', metavar='DATASET_CSV', nargs='?', const='',
+                        help="re-fetch only the AniList titles in an existing dataset that changed since it was scraped "
+                             "(with --store and no CSV, the titles in the store)")
+    parser.add_argument('--store', metavar='SQLITE',
+                        help="also upsert results into this keyed store (see anime_store.py), logging changed rows")
+    parser.add_argument('--snapshots', metavar='DIR',
+                        help="append each title's rank, viewer_reviews and popularity to this history (see snapshots.py)")
+    parser.add_argument('--mal-categories', metavar='LIST',
+                        help="sweep these comma-separated MAL ranking categories instead of the plain ranking "
+                             f"('all-categories' for every one of: {', '.join(MAL_CATEGORIES)})")
+    parser.add_argument('--metrics-report', default='scrape_report.json',
+                        help="where to write the JSON telemetry report ('' to skip)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="serve live Prometheus metrics on this port while scraping")
+    args = parser.parse_args()
+    
+    mal_categories = None
+    if args.mal_categories:
+        mal_categories = (MAL_CATEGORIES if args.mal_categories == 'all-categories'
+                          else [category.strip() for category in args.mal_categories.split(',')])
+    
+    enricher = None
+    
+    def enrich(records):
+        if enricher is not None:
+            enricher.enrich(records)
+    
+    if args.refresh == '' and not args.store:
+        parser.error("--refresh needs a dataset CSV unless --store is given")
+    store = AnimeStore(args.store) if args.store else None
+    
+    def upsert(records):
+        if store is not None and records:
+            counts = store.upsert(records)
+            print(f"🗄️  {args.store}: " + ", ".join(f"{count} {outcome}" for outcome, count in counts.items()))
+    
+    print(f"🎌 Enhanced Anime Scraper - Targeting {args.target} Anime")
     print("=" * 60)
     
-    scraper = AlternativeAnimeScraper()
+    scraper = AlternativeAnimeScraper(cache_path=args.cache or None, offline=args.offline)
+    if args.enrich != 'none':
+        # One enricher (cache connection, rate limit) for the whole run, however many batches it sees
+        enricher = scraper.mal_enricher(source=args.enrich, cache_path=args.enrichment_cache,
+                                        ttl=args.enrichment_ttl_days * 24 * 3600)
+    checkpoint = ScrapeCheckpoint('scrape_checkpoint.jsonl')
+    
+    metrics_server = serve_metrics(scraper.telemetry, port=args.metrics_port) if args.metrics_port else None
+    if metrics_server:
+        print(f"📈 Live scrape metrics on http://127.0.0.1:{args.metrics_port}/metrics")
     
-    # Method 1: Try combined sources (recommended)
-    print("\n🚀 Method 1: Combined sources (AniList + MyAnimeList)")
     try:
-        combined_data = scraper.scrape_combined_sources(5000)
+        if args.refresh is not None:
+            if os.path.exists('score_normalizer.json'):
+                scraper.score_normalizer = ScoreNormalizer.load('score_normalizer.json')
+            dataset = args.refresh or args.store
+            watermark = load_watermark('anilist_watermarks.json', dataset)
+            if not args.refresh:
+                # Only the rows that changed are written back; nothing is rewritten wholesale
+                print(f"\n🔄 Refreshing changed AniList titles in {args.store}")
+                upsert(scraper.refresh_anilist_records(store.records('AniList'), watermark=watermark))
+            else:
+                print(f"\n🔄 Refreshing changed AniList titles in {args.refresh}")
+                records = read_csv_records(args.refresh)
+                updated = scraper.refresh_anilist_records(records, watermark=watermark)
+                save_to_csv(records, args.refresh)
+                save_to_parquet(records, os.path.splitext(args.refresh)[0] + '.parquet')
+                upsert(updated)
+            if scraper.anilist_watermark is not None:
+                save_watermark('anilist_watermarks.json', dataset, scraper.anilist_watermark)
+            return
+        
+        if args.stream:
+            # Large sweeps: pages flow source -> dedup -> calibrate -> enrich -> disk with bounded memory
+            print(f"\n🚀 Streaming AniList + MyAnimeList to {args.target}_anime_stream.csv")
+            if os.path.exists('score_normalizer.json'):
+                scraper.score_normalizer = ScoreNormalizer.load('score_normalizer.json')
+            writer = StreamingDatasetWriter(f'{args.target}_anime_stream.csv', f'{args.target}_anime_stream.parquet')
+            transforms = [scraper.score_normalizer.apply, enrich, upsert]
+            snapshot_run = SnapshotStore(args.snapshots).start_run() if args.snapshots else None
+            if snapshot_run:
+                transforms.append(snapshot_run)
+            sink = StreamingSink(writer, args.target, transforms=transforms, reserved={'AniList': args.target // 2})
+            sources = [
+                AniListSource(scraper, args.target // 2, checkpoint=checkpoint),
+                mal_source(scraper, args.target + 500, checkpoint, mal_categories),
+            ]
+            runner = SourceRunner(sources, sink)
+            try:
+                # A failed source resumes from its journaled pages on the next run
+                if runner.run() and not runner.failures:
+                    checkpoint.clear()
+            finally:
+                if snapshot_run:
+                    snapshot_run.close()
+            return
+        
+        # AniList and MyAnimeList run concurrently; if one source fails the other fills the dataset
+        print("\n🚀 Combined sources (AniList + MyAnimeList)")
+        combined_data = scraper.scrape_combined_sources(args.target, checkpoint=checkpoint,
+                                                        mal_categories=mal_categories)
         if combined_data:
             print(f"✅ Successfully collected {len(combined_data)} entries from combined sources")
-            save_to_csv(combined_data, '5000_anime_combined.csv')
+            enrich(combined_data)
+            save_to_csv(combined_data, f'{args.target}_anime_combined.csv')
+            save_to_parquet(combined_data, f'{args.target}_anime_combined.parquet')
+            upsert(combined_data)
+            if args.snapshots:
+                SnapshotStore(args.snapshots).append(combined_data)
+            scraper.score_normalizer.save('score_normalizer.json')  # Reused by --refresh
+            if not scraper.source_failures:
+                checkpoint.clear()  # Next run starts fresh; otherwise the failed source resumes
             display_sample_data(combined_data, "Combined Sources")
             return  # Success, exit here
-    except Exception as e:
-        print(f"❌ Combined approach failed: {e}")
-    
-    # Method 2: Try AniList only
-    print("\n🚀 Method 2: AniList API only")
-    try:
-        anilist_data = scraper.scrape_anilist_api_enhanced(5000)
-        if anilist_data and len(anilist_data) >= 1000:  # At least 1000
-            print(f"✅ Successfully collected {len(anilist_data)} entries from AniList")
-            save_to_csv(anilist_data, '5000_anime_anilist.csv')
-            display_sample_data(anilist_data, "AniList")
-            return  # Success
-    except Exception as e:
-        print(f"❌ AniList approach failed: {e}")
-    
-    # Method 3: Try MyAnimeList only
-    print("\n🚀 Method 3: MyAnimeList only")
-    try:
-        mal_data = scraper.scrape_myanimelist_enhanced(5000)
-        if mal_data:
-            print(f"✅ Successfully collected {len(mal_data)} entries from MyAnimeList")
-            save_to_csv(mal_data, '5000_anime_mal.csv')
-            display_sample_data(mal_data, "MyAnimeList")
-    except Exception as e:
-        print(f"❌ MyAnimeList approach failed: {e}")
-    
-    print("\n📝 If all methods fail, consider:")
-    print("1. Using a VPN to change your IP address")
-    print("2. Running the script at different times of day")
-    print("3. Using Selenium with browser automation")
-    print("4. Using anime dataset files from Kaggle")
+        
+        print("\n📝 If every source fails, consider:")
+        print("1. Using a VPN to change your IP address")
+        print("2. Running the script at different times of day")
+        print("3. Using Selenium with browser automation")
+        print("4. Using anime dataset files from Kaggle")
+    finally:
+        if enricher is not None:
+            enricher.close()
+        print("\n📈 Scrape telemetry:")
+        for line in scraper.telemetry.summary_lines():
+            print(f"  {line}")
+        if args.metrics_report:
+            scraper.telemetry.save_report(args.metrics_report)
+        if metrics_server:
+            metrics_server.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+import sqlite3
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+from fetcher import ConcurrentFetcher
+
+
+JIKAN_URL = 'https://api.jikan.moe/v4/anime/{}'
+MAL_DETAIL_URL = 'https://myanimelist.net/anime/{}'
+ENRICHED_FIELDS = ['genre', 'studio']
+
+
+def parse_jikan_anime(payload):
+    """genre/studio from a Jikan /anime/{id} response"""
+    data = payload.get('data') or {}
+    return {
+        'genre': ', '.join(g['name'] for g in data.get('genres') or [] if g.get('name')),
+        'studio': ', '.join(s['name'] for s in data.get('studios') or [] if s.get('name')),
+    }
+
+
+def parse_mal_detail_page(content):
+    """genre/studio from a myanimelist.net/anime/{id} page's sidebar"""
+    soup = BeautifulSoup(content, 'html.parser')
+    details = {'genre': '', 'studio': ''}
+    for label in soup.find_all('span', class_='dark_text'):
+        name = label.get_text(strip=True).rstrip(':')
+        if name in ('Genre', 'Genres'):
+            field, link_prefix = 'genre', '/anime/genre/'
+        elif name == 'Studios':
+            field, link_prefix = 'studio', '/anime/producer/'
+        else:
+            continue
+        # "None found, add some" links don't point at a genre or producer page
+        links = [a for a in label.parent.find_all('a') if link_prefix in (a.get('href') or '')]
+        details[field] = ', '.join(a.get_text(strip=True) for a in links)
+    return details
+
+
+class EnrichmentCache:
+    """Per-anime-ID store of fetched detail fields (SQLite backed)"""
+
+    def __init__(self, path='mal_enrichment.sqlite'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS enrichment (
+                mal_id TEXT PRIMARY KEY,
+                genre TEXT,
+                studio TEXT,
+                enriched_at REAL
+            )
+        ''')
+        self.conn.commit()
+
+    def get_fresh(self, mal_ids, ttl):
+        """Return {mal_id: details} for IDs enriched less than ttl seconds ago"""
+        cutoff = time.time() - ttl
+        fresh = {}
+        with self.lock:
+            for mal_id in mal_ids:
+                row = self.conn.execute(
+                    'SELECT genre, studio FROM enrichment WHERE mal_id = ? AND enriched_at >= ?',
+                    (mal_id, cutoff)
+                ).fetchone()
+                if row is not None:
+                    fresh[mal_id] = {'genre': row[0], 'studio': row[1]}
+        return fresh
+
+    def set(self, mal_id, details):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?, ?)',
+                              (mal_id, details['genre'], details['studio'], time.time()))
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM enrichment')
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class MalEnricher:
+    """Fill genre and studio on MAL rows from each anime's detail page.
+
+    The ranking page only carries title, type, episodes, dates and score, so
+    every MAL row needs one extra request. Those requests go through a
+    ConcurrentFetcher (bounded window, shared rate limit), and results are
+    cached per anime ID: IDs enriched within the TTL are not fetched again,
+    so a nightly run only pays for new titles and ones due a refresh.
+
+    One enricher serves a whole run: enrich() can be called per batch and
+    every call shares the cache connection and the fetcher's rate limit.
+    close() it once the run is done.
+    """
+
+    def __init__(self, session, cache, ttl=7 * 24 * 3600, source='jikan', requests_per_second=None,
+                 max_workers=None, telemetry=None):
+        if source not in ('jikan', 'html'):
+            raise ValueError(f"Unknown enrichment source '{source}' (expected 'jikan' or 'html')")
+        self.session = session
+        self.cache = cache
+        self.ttl = ttl
+        self.source = source
+        # Jikan allows 3 req/s but only 60 req/min
+        self.requests_per_second = requests_per_second or (0.9 if source == 'jikan' else 1.0)
+        self.max_workers = max_workers or (2 if source == 'jikan' else 4)
+        self.telemetry = telemetry
+        self.fetcher = None  # Created on first use, then shared by every enrich() call
+
+    def detail_url(self, mal_id):
+        return (JIKAN_URL if self.source == 'jikan' else MAL_DETAIL_URL).format(mal_id)
+
+    def fetch_details(self, fetcher, mal_id):
+        """Fetch and parse one anime's details. Returns None when it should be retried next run"""
+        response = fetcher.fetch(self.detail_url(mal_id))
+        if response is None:
+            return None
+        if response.status_code == 404:
+            return {'genre': '', 'studio': ''}  # Removed from MAL; don't ask again until the TTL expires
+        if response.status_code != 200:
+            return None
+        start = time.perf_counter()
+        try:
+            if self.source == 'jikan':
+                details = parse_jikan_anime(response.json())
+            else:
+                details = parse_mal_detail_page(response.content)
+            if self.telemetry:
+                self.telemetry.record_parse(f"{self.source} details", time.perf_counter() - start, 1)
+            return details
+        except ValueError as e:
+            print(f"  Could not parse details for MAL ID {mal_id}: {e}")
+            return None
+
+    def needs_enrichment(self, record):
+        return bool(record.get('mal_id')) and not all(record.get(field) for field in ENRICHED_FIELDS)
+
+    def enrich(self, records):
+        """Fill empty genre/studio fields in place. Returns how many records were updated"""
+        pending = [record for record in records if self.needs_enrichment(record)]
+        mal_ids = list(dict.fromkeys(str(record['mal_id']) for record in pending))
+        if not mal_ids:
+            return 0
+
+        details = self.cache.get_fresh(mal_ids, self.ttl)
+        to_fetch = [mal_id for mal_id in mal_ids if mal_id not in details]
+        print(f"Enriching {len(mal_ids)} MAL titles: {len(details)} cached, {len(to_fetch)} to fetch "
+              f"from {self.source} with {self.max_workers} workers at {self.requests_per_second} req/s")
+
+        if self.fetcher is None:
+            self.fetcher = ConcurrentFetcher(self.session, requests_per_second=self.requests_per_second,
+                                             max_workers=self.max_workers, telemetry=self.telemetry)
+        fetcher = self.fetcher
+        failed = 0
+        for i, (mal_id, fetched) in enumerate(
+                fetcher.fetch_ordered(to_fetch, fetch=lambda mal_id: self.fetch_details(fetcher, mal_id)), 1):
+            if fetched is None:
+                failed += 1
+            else:
+                self.cache.set(mal_id, fetched)
+                details[mal_id] = fetched
+            if i % 100 == 0:
+                print(f"  Fetched {i}/{len(to_fetch)} detail pages")
+
+        updated = 0
+        for record in pending:
+            fetched = details.get(str(record['mal_id']))
+            if not fetched:
+                continue
+            changed = False
+            for field in ENRICHED_FIELDS:
+                if not record.get(field) and fetched[field]:
+                    record[field] = fetched[field]
+                    changed = True
+            updated += changed
+
+        print(f"Enriched {updated} MAL records ({failed} detail pages failed, will retry next run)")
+        return updated
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,185 @@
+import re
+
+from bs4 import BeautifulSoup
+
+from records import AnimeRecord
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+EPISODES_RE = re.compile(r'(\d+) eps')
+YEAR_RE = re.compile(r'(19|20)\d{2}')
+MAL_ID_RE = re.compile(r'/anime/(\d+)')
+
+
+def empty_mal_record():
+    return AnimeRecord(source='MyAnimeList')
+
+
+def mal_id_from_href(href):
+    """Anime ID from a detail-page link such as https://myanimelist.net/anime/5114/..."""
+    match = MAL_ID_RE.search(href or '')
+    return match.group(1) if match else ''
+
+
+def apply_info_text(anime_data, info_text):
+    """Fill episodes, year and content type from a row's div.information text"""
+    # Extract episodes
+    ep_match = EPISODES_RE.search(info_text)
+    if ep_match:
+        anime_data['number_of_episodes'] = ep_match.group(1)
+    elif 'Movie' in info_text:
+        anime_data['number_of_episodes'] = '1'
+
+    # Extract year
+    year_match = YEAR_RE.search(info_text)
+    if year_match:
+        anime_data['release_date'] = year_match.group(0)
+
+    # Content type
+    if 'TV' in info_text:
+        anime_data['content_type'] = 'TV Series'
+    elif 'Movie' in info_text:
+        anime_data['content_type'] = 'Movie'
+    elif 'OVA' in info_text:
+        anime_data['content_type'] = 'OVA'
+    elif 'Special' in info_text:
+        anime_data['content_type'] = 'Special'
+    else:
+        anime_data['content_type'] = 'TV Series'  # Default
+
+
+def extract_bs4_row(row):
+    """Extract anime data from a BeautifulSoup MAL row element"""
+    anime_data = empty_mal_record()
+
+    # Extract title (the row's first hoverinfo_trigger link is the thumbnail; the title link sits in the h3)
+    title_elem = row.select_one('h3.anime_ranking_h3 a') or row.find('a', class_='hoverinfo_trigger')
+    if title_elem:
+        anime_data['title'] = title_elem.get_text(strip=True)
+        anime_data['mal_id'] = mal_id_from_href(title_elem.get('href'))
+
+    # MAL's own rank ('-' for unranked titles, which leaves it unset)
+    rank_elem = row.find('td', class_='rank')
+    if rank_elem:
+        anime_data['rank'] = rank_elem.get_text(strip=True)
+
+    # Extract additional info
+    info_elem = row.find('div', class_='information')
+    if info_elem:
+        apply_info_text(anime_data, info_elem.get_text())
+
+    # Extract score
+    score_elem = row.find('span', class_='text')
+    if score_elem:
+        anime_data['viewer_reviews'] = score_elem.get_text(strip=True)
+
+    return anime_data
+
+
+def parse_bs4(content):
+    soup = BeautifulSoup(content, 'html.parser')
+    return [extract_bs4_row(row) for row in soup.find_all('tr', class_='ranking-list')]
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+if lxml is not None:
+    LXML_ROWS = etree.XPath(f'//tr[{_has_class("ranking-list")}]')
+    LXML_H3_TITLE = etree.XPath(f'(.//h3[{_has_class("anime_ranking_h3")}]/a)[1]')
+    LXML_TITLE = etree.XPath(f'(.//a[{_has_class("hoverinfo_trigger")}])[1]')
+    LXML_RANK = etree.XPath(f'(.//td[{_has_class("rank")}])[1]')
+    LXML_INFO = etree.XPath(f'(.//div[{_has_class("information")}])[1]')
+    LXML_SCORE = etree.XPath(f'(.//span[{_has_class("text")}])[1]')
+
+
+def _first(xpath, row):
+    found = xpath(row)
+    return found[0] if found else None
+
+
+def parse_lxml(content):
+    records = []
+    for row in LXML_ROWS(lxml.html.fromstring(content)):
+        anime_data = empty_mal_record()
+
+        title_elem = _first(LXML_H3_TITLE, row)
+        if title_elem is None:
+            title_elem = _first(LXML_TITLE, row)
+        if title_elem is not None:
+            anime_data['title'] = ''.join(t.strip() for t in title_elem.itertext())
+            anime_data['mal_id'] = mal_id_from_href(title_elem.get('href'))
+
+        rank_elem = _first(LXML_RANK, row)
+        if rank_elem is not None:
+            anime_data['rank'] = ''.join(t.strip() for t in rank_elem.itertext())
+
+        info_elem = _first(LXML_INFO, row)
+        if info_elem is not None:
+            apply_info_text(anime_data, ''.join(info_elem.itertext()))
+
+        score_elem = _first(LXML_SCORE, row)
+        if score_elem is not None:
+            anime_data['viewer_reviews'] = ''.join(t.strip() for t in score_elem.itertext())
+
+        records.append(anime_data)
+    return records
+
+
+def parse_selectolax(content):
+    records = []
+    for row in LexborHTMLParser(content).css('tr.ranking-list'):
+        anime_data = empty_mal_record()
+
+        title_elem = row.css_first('h3.anime_ranking_h3 a') or row.css_first('a.hoverinfo_trigger')
+        if title_elem is not None:
+            anime_data['title'] = title_elem.text(deep=True, separator='', strip=True)
+            anime_data['mal_id'] = mal_id_from_href(title_elem.attributes.get('href'))
+
+        rank_elem = row.css_first('td.rank')
+        if rank_elem is not None:
+            anime_data['rank'] = rank_elem.text(deep=True, separator='', strip=True)
+
+        info_elem = row.css_first('div.information')
+        if info_elem is not None:
+            apply_info_text(anime_data, info_elem.text(deep=True))
+
+        score_elem = row.css_first('span.text')
+        if score_elem is not None:
+            anime_data['viewer_reviews'] = score_elem.text(deep=True, separator='', strip=True)
+
+        records.append(anime_data)
+    return records
+
+
+PARSERS = {'bs4': parse_bs4}
+if lxml is not None:
+    PARSERS['lxml'] = parse_lxml
+if LexborHTMLParser is not None:
+    PARSERS['selectolax'] = parse_selectolax
+
+
+def default_backend():
+    """Fastest installed backend"""
+    for name in ('selectolax', 'lxml', 'bs4'):
+        if name in PARSERS:
+            return name
+
+
+def parse_mal_ranking_page(content, backend=None):
+    """Parse a MAL topanime.php page into AnimeRecords using the chosen backend"""
+    backend = backend or default_backend()
+    if backend not in PARSERS:
+        raise ValueError(f"Parser backend '{backend}' is not available (installed: {', '.join(PARSERS)})")
+    return PARSERS[backend](content)
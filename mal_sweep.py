@@ -0,0 +1,203 @@
+import time
+from urllib.parse import urlencode
+
+from fetcher import ConcurrentFetcher
+from mal_parser import parse_mal_ranking_page
+from records import AnimeRecord
+from sources import Source
+
+
+MAL_TOP_URL = 'https://myanimelist.net/topanime.php'
+# 'all' is the plain ranking; the rest are topanime.php?type=... lists
+MAL_CATEGORIES = ['all', 'bypopularity', 'airing', 'upcoming', 'tv', 'movie', 'ova', 'special']
+MAL_PAGE_SIZE = 50
+
+
+def category_url(category, limit=0):
+    """Ranking page URL for a category, e.g. topanime.php?type=movie&limit=100"""
+    params = {} if category == 'all' else {'type': category}
+    if limit:
+        params['limit'] = limit
+    return f"{MAL_TOP_URL}?{urlencode(params)}" if params else MAL_TOP_URL
+
+
+class CategoryStats:
+    def __init__(self, name):
+        self.name = name
+        self.next_limit = 0
+        self.requested = 0
+        self.pages = 0
+        self.rows = 0
+        self.new = 0
+        self.failures = 0
+        self.yield_estimate = 1.0  # Optimistic until a page has been seen, so every category gets tried
+        self.stopped = None  # Reason the category was retired
+
+    @property
+    def new_rate(self):
+        return self.new / self.rows if self.rows else 0.0
+
+
+class CategorySweep:
+    """Decide which MAL ranking category to request next.
+
+    The categories overlap heavily (most movies are also in the plain and
+    bypopularity rankings), so each one's recent share of never-seen titles
+    is tracked as an exponentially weighted estimate. The next page always
+    comes from the active category with the best estimate, which moves the
+    request budget towards categories still turning up new titles. A
+    category is retired when it runs out of pages, keeps failing, or its
+    estimate drops below min_yield after min_pages pages.
+    """
+
+    def __init__(self, categories=MAL_CATEGORIES, min_yield=0.1, min_pages=2, smoothing=0.5, max_failures=3):
+        unknown = [category for category in categories if category not in MAL_CATEGORIES]
+        if unknown:
+            raise ValueError(f"Unknown MAL categories {unknown} (available: {', '.join(MAL_CATEGORIES)})")
+        self.stats = {category: CategoryStats(category) for category in dict.fromkeys(categories)}
+        self.min_yield = min_yield
+        self.min_pages = min_pages
+        self.smoothing = smoothing
+        self.max_failures = max_failures
+
+    @property
+    def active(self):
+        return [stats for stats in self.stats.values() if stats.stopped is None]
+
+    def next_page(self):
+        """(category, limit) of the next page to request, or None once every category is retired"""
+        active = self.active
+        if not active:
+            return None
+        # Ties (e.g. before any results) go to the category with the fewest requests, i.e. round robin
+        best = max(active, key=lambda stats: (stats.yield_estimate, -stats.requested))
+        limit = best.next_limit
+        best.next_limit += MAL_PAGE_SIZE
+        best.requested += 1
+        return best.name, limit
+
+    def requests(self):
+        """Endless (category, limit) stream for ConcurrentFetcher.fetch_ordered; ends when all are retired"""
+        while True:
+            page = self.next_page()
+            if page is None:
+                return
+            yield page
+
+    def stop(self, category, reason):
+        stats = self.stats[category]
+        if stats.stopped is None:
+            stats.stopped = reason
+
+    def record_failure(self, category):
+        stats = self.stats[category]
+        stats.failures += 1
+        if stats.failures >= self.max_failures:
+            self.stop(category, f"{stats.failures} failed pages")
+
+    def record_page(self, category, rows, new):
+        stats = self.stats[category]
+        stats.failures = 0
+        stats.pages += 1
+        stats.rows += rows
+        stats.new += new
+        if rows == 0:
+            self.stop(category, 'end of ranking')
+            return
+        stats.yield_estimate += self.smoothing * (new / rows - stats.yield_estimate)
+        if stats.pages >= self.min_pages and stats.yield_estimate < self.min_yield:
+            self.stop(category, f"yield fell below {self.min_yield:.0%}")
+        elif rows < MAL_PAGE_SIZE:
+            self.stop(category, 'end of ranking')
+
+    def report(self):
+        print(f"  {'category':<14}{'pages':>6}{'rows':>7}{'new':>6}{'yield':>7}  status")
+        for stats in self.stats.values():
+            print(f"  {stats.name:<14}{stats.pages:>6}{stats.rows:>7}{stats.new:>6}{stats.new_rate:>7.0%}  "
+                  f"{stats.stopped or 'active'}")
+
+
+class MalCategorySweepSource(Source):
+    """Every MAL ranking category, interleaved by how many new titles each still yields.
+
+    Pages go through one ConcurrentFetcher, so the categories share the rate
+    limit; titles are deduplicated across categories, and per-category stats
+    are printed when the sweep ends. Journaled pages are keyed per category
+    ('MyAnimeList/<category>') and replayed without a request.
+    """
+
+    name = 'MyAnimeList'
+
+    def __init__(self, scraper, target_count=5000, checkpoint=None, categories=MAL_CATEGORIES,
+                 requests_per_second=1.0, max_workers=4, **sweep_options):
+        self.scraper = scraper
+        self.target_count = target_count
+        self.checkpoint = checkpoint
+        self.requests_per_second = requests_per_second
+        self.max_workers = max_workers
+        self.sweep = CategorySweep(categories, **sweep_options)
+
+    def journal_key(self, category):
+        return f"{self.name}/{category}"
+
+    def iter_batches(self):
+        collected = 0
+        seen_titles = set()
+        fetcher = ConcurrentFetcher(self.scraper.session, requests_per_second=self.requests_per_second,
+                                    max_workers=self.max_workers, telemetry=self.scraper.telemetry)
+
+        def fetch_page(page):
+            category, limit = page
+            if self.checkpoint and self.checkpoint.is_done(self.journal_key(category), limit):
+                return None  # Replayed from the journal, no request needed
+            if self.sweep.stats[category].stopped is not None:
+                return None  # Retired while this page was queued
+            return fetcher.fetch(category_url(category, limit))
+
+        print(f"Sweeping {len(self.sweep.stats)} MAL categories for {self.target_count} anime "
+              f"with {self.max_workers} workers at {self.requests_per_second} req/s")
+        pages = fetcher.fetch_ordered(self.sweep.requests(), fetch=fetch_page)
+        try:
+            for (category, limit), response in pages:
+                if collected >= self.target_count:
+                    print(f"Reached target of {self.target_count} anime!")
+                    break
+
+                key = self.journal_key(category)
+                if self.checkpoint and self.checkpoint.is_done(key, limit):
+                    page_records = [AnimeRecord.from_dict(r) for r in self.checkpoint.records(key, limit)]
+                elif response is None and self.sweep.stats[category].stopped is not None:
+                    continue  # Never requested: the category was retired while this page was queued
+                elif response is None or response.status_code != 200:
+                    status = response.status_code if response is not None else 'no response'
+                    print(f"  {category} offset {limit}: status {status}, skipping...")
+                    self.sweep.record_failure(category)
+                    continue
+                else:
+                    parse_start = time.perf_counter()
+                    try:
+                        page_records = parse_mal_ranking_page(response.content, self.scraper.parser_backend)
+                    except Exception as e:
+                        print(f"  {category} offset {limit}: could not parse page: {e}")
+                        self.sweep.record_failure(category)
+                        continue
+                    self.scraper.telemetry.record_parse(f"MyAnimeList/{category}", time.perf_counter() - parse_start,
+                                                        len(page_records))
+                    if self.checkpoint and page_records:
+                        self.checkpoint.record_page(key, limit, page_records)
+
+                if category != 'all':
+                    # Other lists number titles within the list; only the plain ranking's rank is comparable
+                    for record in page_records:
+                        record.pop('rank', None)
+
+                batch = self.scraper.unique_records(page_records, seen_titles, self.target_count - collected)
+                self.sweep.record_page(category, len(page_records), len(batch))
+                collected += len(batch)
+                print(f"  {category} offset {limit}: {len(batch)}/{len(page_records)} new. Total unique: {collected}")
+                if batch:
+                    yield batch
+        finally:
+            pages.close()  # Cancel any prefetched pages we no longer need
+            print(f"\nMAL category sweep complete! Got {collected} anime")
+            self.sweep.report()
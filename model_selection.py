@@ -0,0 +1,205 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.linear_model import Ridge
+
+from features import load_prepared_dataset
+from popularity_model import PopularityModel
+
+
+DEFAULT_ALPHAS = [0.01, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0]
+
+# Worker-side views of the arrays the driver put in shared memory (see _attach)
+_shared = {}
+
+
+def time_series_folds(years, n_splits=5):
+    """Forward-chaining splits on release_year: [(train_until, valid_until), ...].
+
+    Years are cut into n_splits + 1 consecutive blocks of roughly equal row
+    counts. Fold k trains on every year up to the end of block k and
+    validates on block k + 1, so a model is never scored on titles older
+    than the ones it learned from and a year is never split across sides.
+    """
+    years = np.asarray(years, dtype=float)
+    years = years[~np.isnan(years)]
+    unique, counts = np.unique(years, return_counts=True)
+    cumulative = np.cumsum(counts) / counts.sum()
+    cuts = [unique[np.searchsorted(cumulative, k / (n_splits + 1))] for k in range(1, n_splits + 1)]
+    boundaries = sorted(set(cuts) | {unique[-1]})
+    if len(boundaries) < 2:
+        raise ValueError(f"Not enough distinct release years for {n_splits} time-based folds")
+    return [(float(train_until), float(valid_until)) for train_until, valid_until in zip(boundaries, boundaries[1:])]
+
+
+def param_grid(alphas):
+    """Ridge parameter sets for a grid of alphas (PopularityModel's one hyperparameter)"""
+    return [{'alpha': float(alpha)} for alpha in alphas]
+
+
+def random_params(n, low=1e-3, high=1e3, seed=0):
+    """n log-uniform Ridge alphas in [low, high]"""
+    rng = np.random.default_rng(seed)
+    return [{'alpha': float(alpha)} for alpha in np.exp(rng.uniform(np.log(low), np.log(high), n))]
+
+
+def share_arrays(arrays):
+    """Copy arrays into new shared-memory blocks; returns (blocks, specs to attach them by)"""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def _attach(specs):
+    """Pool initializer: map the driver's shared arrays and rebuild each fold's CSR matrix without copying"""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared.setdefault('blocks', []).append(block)  # Keeps the mapping alive
+        _shared[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _shared['X'] = {}
+    for fold in range(int(_shared['n_folds'][0])):
+        _shared['X'][fold] = sp.csr_matrix(
+            (_shared[f'data_{fold}'], _shared[f'indices_{fold}'], _shared[f'indptr_{fold}']),
+            shape=tuple(_shared[f'shape_{fold}']), copy=False)
+
+
+def _detach():
+    blocks = _shared.pop('blocks', [])
+    _shared.clear()  # Views must go before their blocks can be closed
+    for block in blocks:
+        block.close()
+
+
+def fold_features(df_clean, years, train_until, valid_until):
+    """Feature matrix for one fold's rows (release_year <= valid_until), in df_clean order.
+
+    Encoder vocabularies and year scaling are fitted on the training rows
+    only, so nothing about the validation block leaks into its features:
+    genres or studios first seen there are unknown tokens, as they would be
+    for a model trained at that point in time.
+    """
+    model = PopularityModel().fit_encoders(df_clean[years <= train_until])
+    return model.build_features(df_clean[years <= valid_until])
+
+
+def _evaluate(task):
+    """Fit one parameter set on one fold; returns validation metrics"""
+    params_id, params, fold, train_until, valid_until = task
+    rows = _shared['years'] <= valid_until
+    X, y, years = _shared['X'][fold], _shared['y'][rows], _shared['years'][rows]
+    train = years <= train_until
+    valid = years > train_until
+
+    start = time.perf_counter()
+    regressor = Ridge(**params).fit(X[train], y[train])
+    predicted = regressor.predict(X[valid])
+    errors = y[valid] - predicted
+    total = ((y[valid] - y[valid].mean()) ** 2).sum()
+    return {
+        'params_id': params_id,
+        'fold': fold,
+        'train_rows': int(train.sum()),
+        'valid_rows': int(valid.sum()),
+        'rmse': float(np.sqrt((errors ** 2).mean())),
+        'mae': float(np.abs(errors).mean()),
+        'r2': float(1 - (errors ** 2).sum() / total) if total else float('nan'),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+
+def cross_validate(df, param_sets, n_splits=5, max_workers=None, target=None):
+    """Score every parameter set on time-based folds across a process pool.
+
+    Each fold's feature matrix is built once in the driver, with encoders
+    and year scaling fitted on that fold's training rows (see fold_features),
+    and handed to workers through shared memory: each worker maps the CSR
+    arrays, the labels and release years instead of receiving a pickled
+    copy, and tasks carry only (params, fold). Returns per-fold results and a
+    per-parameter summary sorted by mean RMSE.
+    """
+    df_clean, y = PopularityModel().labelled_rows(df, target)
+    years = df_clean['release_year'].to_numpy(dtype=float)
+    folds = time_series_folds(years, n_splits)
+    tasks = [(params_id, params, fold, train_until, valid_until)
+             for params_id, params in enumerate(param_sets)
+             for fold, (train_until, valid_until) in enumerate(folds)]
+
+    arrays = {'y': y, 'years': years, 'n_folds': np.array([len(folds)])}
+    for fold, (train_until, valid_until) in enumerate(folds):
+        X = fold_features(df_clean, years, train_until, valid_until)
+        arrays.update({f'data_{fold}': X.data, f'indices_{fold}': X.indices, f'indptr_{fold}': X.indptr,
+                       f'shape_{fold}': np.array(X.shape)})
+
+    max_workers = max_workers or os.cpu_count() or 1
+    print(f"🔁 {len(param_sets)} parameter sets x {len(folds)} time folds on {len(df_clean)} titles, "
+          f"{max_workers} workers")
+    blocks, specs = share_arrays(arrays)
+    try:
+        if max_workers == 1:
+            _attach(specs)
+            results = [_evaluate(task) for task in tasks]
+            _detach()
+        else:
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach, initargs=(specs,)) as pool:
+                results = list(pool.map(_evaluate, tasks, chunksize=chunksize))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    results = pd.DataFrame(results)
+    summary = results.groupby('params_id').agg(
+        rmse=('rmse', 'mean'), rmse_std=('rmse', 'std'), mae=('mae', 'mean'), r2=('r2', 'mean'))
+    summary.insert(0, 'params', [param_sets[i] for i in summary.index])
+    return results, summary.sort_values('rmse').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-split cross-validation and Ridge alpha search")
+    parser.add_argument('dataset', help=".csv/.parquet dataset")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--alphas', default=','.join(str(alpha) for alpha in DEFAULT_ALPHAS),
+                        help="comma-separated grid of Ridge alphas")
+    parser.add_argument('--random', type=int, metavar='N',
+                        help="sample N log-uniform alphas from --alpha-range instead of the grid")
+    parser.add_argument('--alpha-range', default='0.001,1000')
+    parser.add_argument('--workers', type=int, help="processes (default: every core)")
+    parser.add_argument('--results', metavar='CSV', help="write per-fold results here")
+    parser.add_argument('--save', metavar='MODEL_PKL', help="refit the best alpha on every row and save the model")
+    args = parser.parse_args()
+
+    if args.random:
+        low, high = (float(value) for value in args.alpha_range.split(','))
+        param_sets = random_params(args.random, low, high)
+    else:
+        param_sets = param_grid(args.alphas.split(','))
+
+    df_clean = load_prepared_dataset(args.dataset)
+    start = time.perf_counter()
+    results, summary = cross_validate(df_clean, param_sets, args.folds, args.workers)
+    print(f"✅ {len(results)} fits in {time.perf_counter() - start:.1f}s\n")
+    print(summary.head(10).to_string(index=False))
+    if args.results:
+        results.to_csv(args.results, index=False)
+
+    best = summary.iloc[0]['params']
+    print(f"\n🏆 Best: {best} (mean RMSE {summary.iloc[0]['rmse']:.4f})")
+    if args.save:
+        PopularityModel(**best).fit(df_clean).save(args.save)
+        print(f"✅ Model saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
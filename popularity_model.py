@@ -0,0 +1,162 @@
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.linear_model import Ridge
+
+from encoders import FeatureMatrixBuilder
+from features import prepare_dataset, load_prepared_dataset
+
+
+INPUT_COLUMNS = ['title', 'genre', 'studio', 'number_of_episodes', 'release_date', 'content_type']
+# The cleaning pipeline also expects viewer_reviews, which upcoming titles do not have yet
+PIPELINE_COLUMNS = INPUT_COLUMNS + ['viewer_reviews']
+# Carries caller-supplied label values through cleaning, so they stay aligned with the kept rows
+TARGET_COLUMN = '_target'
+
+
+def default_target(df_clean):
+    """Popularity label: AniList popularity when scraped, otherwise the calibrated 0-10 score"""
+    if 'popularity' in df_clean and df_clean['popularity'].notna().any():
+        # MAL-only rows have no AniList popularity and are left unlabelled
+        return np.log1p(pd.to_numeric(df_clean['popularity'], errors='coerce').astype(float).to_numpy())
+    return df_clean['score'].to_numpy(dtype=float)
+
+
+class PopularityModel:
+    """Ridge regression over sparse genre/studio/type multi-hot plus episode and year features"""
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.encoders = FeatureMatrixBuilder(columns=('genre', 'studio', 'content_type'))
+        self.regressor = Ridge(alpha=alpha)
+        self.year_mean = 0.0
+        self.year_std = 1.0
+
+    def numeric_features(self, df_clean):
+        episodes = df_clean['number_of_episodes'].to_numpy(dtype=float)
+        years = df_clean['release_year'].to_numpy(dtype=float)
+        years = np.where(np.isnan(years), self.year_mean, years)
+        return np.column_stack([
+            np.log1p(episodes),
+            (episodes == 0).astype(float),  # Episode count unknown
+            (years - self.year_mean) / self.year_std,
+        ])
+
+    def build_features(self, df_clean):
+        return sp.hstack([self.encoders.transform(df_clean), sp.csr_matrix(self.numeric_features(df_clean))],
+                         format='csr')
+
+    @property
+    def feature_names(self):
+        return self.encoders.feature_names + ['log_episodes', 'episodes_unknown', 'release_year_z']
+
+    def labelled_rows(self, df, target=None):
+        """(df_clean, y) for the rows that are kept by cleaning and carry a label.
+
+        `target` is a column name, or values aligned with the rows of `df`;
+        either way it follows the rows prepare drops. Defaults to
+        default_target.
+        """
+        if target is not None and not isinstance(target, str):
+            values = np.asarray(target, dtype=float)
+            df = df if isinstance(df, pd.DataFrame) else pd.DataFrame(list(df))
+            if len(values) != len(df):
+                raise ValueError(f"target has {len(values)} values for {len(df)} rows")
+            df, target = df.assign(**{TARGET_COLUMN: values}), TARGET_COLUMN
+
+        df_clean = self.prepare(df, drop_missing_year=True)
+        if target is None:
+            y = default_target(df_clean)
+        else:
+            y = pd.to_numeric(df_clean[target], errors='coerce').to_numpy(dtype=float)
+
+        # Unrated titles carry no label
+        labelled = ~np.isnan(y)
+        return df_clean[labelled].reset_index(drop=True), y[labelled]
+
+    def fit_features(self, df, target=None):
+        """Fit the encoders and year scaling on the labelled rows; returns (df_clean, X, y)"""
+        df_clean, y = self.labelled_rows(df, target)
+        self.fit_encoders(df_clean)
+        return df_clean, self.build_features(df_clean), y
+
+    def fit_encoders(self, df_clean):
+        """Fit the encoder vocabularies and year scaling on already cleaned rows"""
+        self.encoders.fit(df_clean)
+        years = df_clean['release_year'].to_numpy(dtype=float)
+        self.year_mean = float(np.nanmean(years))
+        self.year_std = float(np.nanstd(years)) or 1.0
+        return self
+
+    def fit(self, df, target=None):
+        """Fit on a raw or cleaned dataset; target (see labelled_rows) defaults to default_target"""
+        _, X, y = self.fit_features(df, target)
+        self.regressor.fit(X, y)
+        return self
+
+    def prepare(self, data, drop_missing_year=False):
+        """Accept a DataFrame or a list of save_to_csv-style row dicts"""
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        for column in PIPELINE_COLUMNS:
+            if column not in df:
+                df[column] = None
+        return prepare_dataset(df, drop_missing_year=drop_missing_year)
+
+    def predict_batch(self, data):
+        """Score any number of candidate titles in one vectorized call"""
+        df_clean = self.prepare(data)
+        if df_clean.empty:
+            return np.zeros(0)
+        return self.regressor.predict(self.build_features(df_clean))
+
+    def save(self, filename):
+        state = {
+            'alpha': self.alpha,
+            'encoders': self.encoders.to_dict(),
+            'regressor': self.regressor,
+            'year_mean': self.year_mean,
+            'year_std': self.year_std,
+        }
+        with open(filename, 'wb') as f:
+            pickle.dump(state, f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            state = pickle.load(f)
+        model = cls(alpha=state['alpha'])
+        model.encoders = FeatureMatrixBuilder.from_dict(state['encoders'])
+        model.regressor = state['regressor']
+        model.year_mean = state['year_mean']
+        model.year_std = state['year_std']
+        return model
+
+
+def main():
+    usage = ("Usage:\n"
+             "  python popularity_model.py train <dataset .csv/.parquet> <model.pkl>\n"
+             "  python popularity_model.py score <model.pkl> <candidates.csv> <scored.csv>")
+    if len(sys.argv) < 2 or sys.argv[1] not in ('train', 'score'):
+        print(usage)
+        sys.exit(1)
+
+    if sys.argv[1] == 'train' and len(sys.argv) == 4:
+        model = PopularityModel().fit(load_prepared_dataset(sys.argv[2]))
+        model.save(sys.argv[3])
+        print(f"✅ Model saved to {sys.argv[3]}")
+    elif sys.argv[1] == 'score' and len(sys.argv) == 5:
+        model = PopularityModel.load(sys.argv[2])
+        candidates = pd.read_csv(sys.argv[3])
+        candidates['predicted_popularity'] = model.predict_batch(candidates)
+        candidates.sort_values('predicted_popularity', ascending=False).to_csv(sys.argv[4], index=False)
+        print(f"✅ Scored {len(candidates)} titles to {sys.argv[4]}")
+    else:
+        print(usage)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from popularity_model import PopularityModel, INPUT_COLUMNS
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-title requests into one predict_batch call.
+
+    A worker thread waits for the first queued request, then keeps collecting
+    for up to max_wait_ms (or until max_batch rows) before scoring them all
+    together.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait_ms=5):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, rows):
+        """Queue a list of rows and return a Future resolving to their scores"""
+        future = Future()
+        self.requests.put((rows, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            rows = [row for item_rows, _ in batch for row in item_rows]
+            try:
+                scores = self.model.predict_batch(rows)
+            except Exception:
+                # Score each request on its own so one bad row only fails the request it came in
+                for item_rows, future in batch:
+                    try:
+                        future.set_result(self.model.predict_batch(item_rows))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+
+            start = 0
+            for item_rows, future in batch:
+                future.set_result(scores[start:start + len(item_rows)])
+                start += len(item_rows)
+
+
+def coerce_row(row):
+    """A request row reduced to INPUT_COLUMNS with the types the model expects; ValueError if it can't be"""
+    clean = {}
+    for column in INPUT_COLUMNS:
+        value = row.get(column)
+        if value is None:
+            continue
+        if column == 'number_of_episodes':
+            if value == '':
+                continue
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                episodes = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{column} must be a number, got {value!r}") from None
+            if not math.isfinite(episodes) or episodes < 0:
+                raise ValueError(f"{column} must be a non-negative number, got {value!r}")
+            clean[column] = episodes
+        elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            clean[column] = str(value)
+        else:
+            raise ValueError(f"{column} must be a string")
+    return clean
+
+
+class LatencyTracker:
+    """Rolling window of request latencies"""
+
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self.lock:
+            samples = np.array(self.samples)
+            count = self.count
+        if not len(samples):
+            return {'requests': count}
+        return {
+            'requests': count,
+            'p50_ms': round(float(np.percentile(samples, 50)) * 1000, 3),
+            'p99_ms': round(float(np.percentile(samples, 99)) * 1000, 3),
+            'max_ms': round(float(samples.max()) * 1000, 3),
+        }
+
+
+def make_handler(batcher, latency):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive for clients posting many titles
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            elif self.path == '/stats':
+                self._send_json(200, latency.summary())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                # rfile.read(-1) would block until the client closes its keep-alive connection
+                self.close_connection = True
+                self._send_json(400, {'error': 'invalid Content-Length'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b'null')
+            except ValueError:
+                self._send_json(400, {'error': 'invalid JSON'})
+                return
+
+            # Accept one save_to_csv-style row or a list of them
+            single = isinstance(payload, dict)
+            rows = [payload] if single else payload
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                self._send_json(400, {'error': f"expected an object or list of objects with fields {INPUT_COLUMNS}"})
+                return
+            try:
+                clean_rows = [coerce_row(row) for row in rows]
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            try:
+                scores = batcher.submit(clean_rows).result() if clean_rows else []
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+
+            results = [{'title': row.get('title', ''), 'predicted_popularity': float(score)}
+                       for row, score in zip(rows, scores)]
+            self._send_json(200, results[0] if single else results)
+            latency.record(time.perf_counter() - start)
+
+    return PredictionHandler
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 resets bursts of concurrent clients
+
+
+def create_server(model, host='127.0.0.1', port=8000, max_batch=256, max_wait_ms=5):
+    batcher = MicroBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    latency = LatencyTracker()
+    server = PredictionServer((host, port), make_handler(batcher, latency))
+    server.latency = latency
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve popularity predictions over HTTP/JSON")
+    parser.add_argument('model', help="model file written by PopularityModel.save")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    # Load once at startup and warm up so the first request doesn't pay for it
+    model = PopularityModel.load(args.model)
+    model.predict_batch([{'title': 'warmup'}])
+
+    server = create_server(model, args.host, args.port, args.max_batch, args.max_wait_ms)
+    print(f"🔮 Serving predictions on http://{args.host}:{args.port}/predict (stats at /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nLatency: {server.latency.summary()}")
+
+
+if __name__ == "__main__":
+    main()
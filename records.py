@@ -0,0 +1,139 @@
+import re
+from collections.abc import MutableMapping
+
+from anilist_query import ANILIST_COLUMNS
+
+
+RELEASE_DATE_RE = re.compile(r'^\s*(\d{4})(?:-(\d{1,2}))?')
+
+# One shared instance per distinct value, so repeated genres/types/sources cost a pointer each
+_interned = {}
+
+
+def intern_text(value):
+    if value is None:
+        return ''
+    value = str(value).strip()
+    return _interned.setdefault(value, value)
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _keep(value):
+    return value
+
+
+TEXT_FIELDS = ['title']
+CATEGORICAL_FIELDS = ['genre', 'studio', 'content_type', 'source']
+INT_FIELDS = ['number_of_episodes', 'mal_id', 'rank'] + ANILIST_COLUMNS
+FLOAT_FIELDS = ['viewer_reviews', 'score']
+OBJECT_FIELDS = ['aliases', 'merged_from', 'source_scores']
+
+# Key order matches the save_to_csv row, then everything optional
+FIELDS = (['title', 'genre', 'studio', 'number_of_episodes', 'release_date', 'content_type',
+           'viewer_reviews', 'source', 'score', 'mal_id', 'rank'] + ANILIST_COLUMNS + OBJECT_FIELDS)
+
+_COERCE = {}
+_COERCE.update({field: lambda v: '' if v is None else str(v) for field in TEXT_FIELDS})
+_COERCE.update({field: intern_text for field in CATEGORICAL_FIELDS})
+_COERCE.update({field: _to_int for field in INT_FIELDS})
+_COERCE.update({field: _to_float for field in FLOAT_FIELDS})
+_COERCE.update({field: _keep for field in OBJECT_FIELDS})
+
+
+class AnimeRecord(MutableMapping):
+    """One scraped anime in typed, slotted storage.
+
+    Behaves like the row dicts the scrapers used to build (record['genre'],
+    record.get('score'), dict(record)), but episodes, IDs and counts are held
+    as ints, scores as floats, release_date as year/month ints, and
+    categorical text (genre, studio, content_type, source) as shared interned
+    strings. Text fields always read as '' when empty; other fields count as
+    missing while None.
+    """
+
+    __slots__ = ['release_year', 'release_month'] + [f for f in FIELDS if f != 'release_date']
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        for field in TEXT_FIELDS + CATEGORICAL_FIELDS:
+            setattr(self, field, '')
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        for key, value in data.items():
+            if key in _COERCE or key == 'release_date':
+                record[key] = value
+        return record
+
+    def to_dict(self):
+        return dict(self)
+
+    def __getitem__(self, key):
+        if key == 'release_date':
+            if self.release_year is None:
+                return ''
+            if self.release_month is None:
+                return str(self.release_year)
+            return f"{self.release_year}-{self.release_month:02d}"
+        if key not in _COERCE:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key == 'release_date':
+            match = RELEASE_DATE_RE.match(str(value or ''))
+            self.release_year = int(match.group(1)) if match else None
+            self.release_month = int(match.group(2)) if match and match.group(2) else None
+            return
+        if key not in _COERCE:
+            raise KeyError(f"AnimeRecord has no field '{key}'")
+        setattr(self, key, _COERCE[key](value))
+
+    def __delitem__(self, key):
+        self[key]  # KeyError when unset
+        if key in TEXT_FIELDS or key in CATEGORICAL_FIELDS:
+            setattr(self, key, '')
+        elif key == 'release_date':
+            self.release_year = self.release_month = None
+        else:
+            setattr(self, key, None)
+
+    def __iter__(self):
+        for field in FIELDS:
+            if field == 'release_date' or field in TEXT_FIELDS or field in CATEGORICAL_FIELDS:
+                yield field
+            elif getattr(self, field) is not None:
+                yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"AnimeRecord({dict(self)!r})"
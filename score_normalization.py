@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# Native viewer_reviews scale per source; the calibrated score is on the MAL 0-10 scale
+SOURCE_SCALES = {'AniList': 100.0, 'MyAnimeList': 10.0}
+REFERENCE_SOURCE = 'MyAnimeList'
+
+
+def _to_scores(values):
+    scores = np.array(pd.to_numeric(pd.Series(values, dtype=object), errors='coerce'), dtype=float)
+    scores[scores <= 0] = np.nan  # 0 / blank means "not rated yet"
+    return scores
+
+
+class ScoreNormalizer:
+    """Map each source's viewer_reviews onto one calibrated 0-10 score.
+
+    For a source with enough titles that were also matched on the reference
+    source (MAL), the mapping is a quantile mapping fitted on those overlapping
+    titles: a score at the q-th quantile of the source becomes the q-th
+    quantile of the reference scores for the same titles. Sources without
+    enough overlap fall back to a linear rescale of their native scale.
+    """
+
+    def __init__(self, min_overlap=30, n_quantiles=101):
+        self.min_overlap = min_overlap
+        self.n_quantiles = n_quantiles
+        self.mappings = {}  # source -> (source quantiles, reference quantiles)
+
+    def fit(self, overlaps):
+        """overlaps: {source: (source scores, reference scores)} for the same titles"""
+        self.mappings = {}
+        quantiles = np.linspace(0, 1, self.n_quantiles)
+        for source, (source_scores, reference_scores) in overlaps.items():
+            source_scores = _to_scores(source_scores)
+            reference_scores = _to_scores(reference_scores)
+            both = ~np.isnan(source_scores) & ~np.isnan(reference_scores)
+            if both.sum() < self.min_overlap:
+                print(f"Only {both.sum()} overlapping {source} titles, using linear rescaling")
+                continue
+            self.mappings[source] = (
+                np.quantile(source_scores[both], quantiles).tolist(),
+                np.quantile(reference_scores[both], quantiles).tolist(),
+            )
+        return self
+
+    def fit_records(self, records):
+        """Fit from merged records carrying per-source 'source_scores'"""
+        overlaps = {}
+        for record in records:
+            source_scores = record.get('source_scores') or {}
+            if REFERENCE_SOURCE not in source_scores:
+                continue
+            for source, value in source_scores.items():
+                if source != REFERENCE_SOURCE:
+                    pairs = overlaps.setdefault(source, ([], []))
+                    pairs[0].append(value)
+                    pairs[1].append(source_scores[REFERENCE_SOURCE])
+        return self.fit(overlaps)
+
+    def transform(self, source, values):
+        """Calibrated 0-10 scores for one source's raw viewer_reviews (NaN when unrated)"""
+        scores = _to_scores(values)
+        if source == REFERENCE_SOURCE:
+            return scores
+        if source in self.mappings:
+            source_quantiles, reference_quantiles = self.mappings[source]
+            mapped = np.interp(scores, source_quantiles, reference_quantiles)
+            return np.where(np.isnan(scores), np.nan, mapped)
+        return scores * 10.0 / SOURCE_SCALES.get(source, 10.0)
+
+    def transform_frame(self, df):
+        """Vectorized score column for a DataFrame with viewer_reviews and source"""
+        score = np.full(len(df), np.nan)
+        sources = df['source'].astype(str).to_numpy() if 'source' in df else np.full(len(df), REFERENCE_SOURCE)
+        raw = df['viewer_reviews'].to_numpy()
+        for source in pd.unique(sources):
+            mask = sources == source
+            score[mask] = self.transform(source, raw[mask])
+        return score
+
+    def apply(self, records):
+        """Set a float 'score' on every record, in place"""
+        if not records:
+            return records
+        scores = self.transform_frame(pd.DataFrame(
+            {'viewer_reviews': [r.get('viewer_reviews') for r in records],
+             'source': [r.get('source') for r in records]}))
+        for record, score in zip(records, scores):
+            record['score'] = None if np.isnan(score) else round(float(score), 3)
+        return records
+
+    def to_dict(self):
+        return {'min_overlap': self.min_overlap, 'n_quantiles': self.n_quantiles, 'mappings': self.mappings}
+
+    @classmethod
+    def from_dict(cls, state):
+        normalizer = cls(min_overlap=state['min_overlap'], n_quantiles=state['n_quantiles'])
+        normalizer.mappings = {source: tuple(m) for source, m in state['mappings'].items()}
+        return normalizer
+
+    def save(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
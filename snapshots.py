@@ -0,0 +1,239 @@
+import argparse
+import glob
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from anime_store import anime_key, load_records
+from records import AnimeRecord
+
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ('source', pa.string()),
+    ('source_id', pa.string()),
+    ('run_at', pa.timestamp('s', tz='UTC')),
+    ('title', pa.string()),
+    ('rank', pa.int32()),
+    # Hundredths, so the column is an integer Parquet can delta-encode; read back as float
+    ('viewer_reviews_centi', pa.int32()),
+    ('popularity', pa.int64()),
+])
+# Integer columns whose values move slowly within a title's history: after compaction the rows of one
+# title are adjacent and in time order, so each is stored as small deltas from the previous snapshot
+DELTA_COLUMNS = ['run_at', 'rank', 'viewer_reviews_centi', 'popularity']
+HISTORY_ROW_GROUP = 65536
+SECONDS_PER_WEEK = 7 * 24 * 3600
+
+
+def _timestamp(when):
+    """A run time (datetime, ISO string or epoch seconds) as a UTC pandas Timestamp"""
+    if isinstance(when, (int, float)):
+        return pd.Timestamp(when, unit='s', tz='UTC')
+    when = pd.Timestamp(when)
+    return when.tz_localize('UTC') if when.tz is None else when.tz_convert('UTC')
+
+
+class SnapshotRun:
+    """Snapshot rows for one scrape run, written as record batches arrive.
+
+    rank is the rank MAL shows for the title in its plain ranking (see
+    mal_parser), and null for titles without one, including every AniList
+    row. Scrape order is not used: with concurrent sources, dedup and
+    category sweeps it changes from run to run. Usable as a StreamingSink
+    transform; call close() once the run is done.
+    """
+
+    def __init__(self, store, run_at=None):
+        self.store = store
+        self.run_at = int(_timestamp(run_at if run_at is not None else time.time()).timestamp())
+        self.rows = 0
+
+    def __call__(self, records):
+        self.write(records)
+
+    def write(self, records):
+        columns = {name: [] for name in SNAPSHOT_SCHEMA.names}
+        for record in records:
+            typed = record if isinstance(record, AnimeRecord) else AnimeRecord.from_dict(record)
+            source, source_id = anime_key(typed)
+            reviews = typed.get('viewer_reviews')
+            columns['source'].append(source)
+            columns['source_id'].append(source_id)
+            columns['run_at'].append(self.run_at)
+            columns['title'].append(typed.get('title'))
+            columns['rank'].append(typed.get('rank'))
+            columns['viewer_reviews_centi'].append(round(reviews * 100) if reviews is not None else None)
+            columns['popularity'].append(typed.get('popularity'))
+        if columns['source']:
+            self.store.write_run(pa.table(columns, schema=SNAPSHOT_SCHEMA), self.run_at)
+            self.rows += len(columns['source'])
+
+    def close(self):
+        print(f"✅ Snapshot of {self.rows} titles recorded in {self.store.directory}")
+        return self.rows
+
+
+class SnapshotStore:
+    """Append-only history of each title's rank, viewer_reviews and popularity per scrape run.
+
+    Each run is appended as its own small Parquet file under runs/, so
+    recording a scrape never rewrites earlier history. compact() folds the
+    run files into history.parquet sorted by (source, source_id, run_at) and
+    delta-encoded (see DELTA_COLUMNS), where a title's whole time series costs
+    a few bytes per snapshot. Queries read history and pending runs together
+    and push source/title and time filters down to Parquet row-group
+    statistics.
+    """
+
+    def __init__(self, directory='snapshots'):
+        self.directory = directory
+        self.runs_dir = os.path.join(directory, 'runs')
+        self.history_path = os.path.join(directory, 'history.parquet')
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    def start_run(self, run_at=None):
+        return SnapshotRun(self, run_at)
+
+    def append(self, records, run_at=None):
+        """Record one scrape run's rows; returns how many were recorded"""
+        run = self.start_run(run_at)
+        run.write(records)
+        return run.close()
+
+    def write_run(self, table, run_at):
+        path = os.path.join(self.runs_dir, f"run-{run_at}-{uuid.uuid4().hex[:8]}.parquet")
+        pq.write_table(table, path + '.tmp', compression='zstd')
+        os.replace(path + '.tmp', path)  # Readers never see a half-written run
+
+    def _files(self):
+        files = sorted(glob.glob(os.path.join(self.runs_dir, 'run-*.parquet')))
+        return ([self.history_path] if os.path.exists(self.history_path) else []) + files
+
+    def compact(self):
+        """Merge pending run files into history.parquet; returns the number of runs folded in"""
+        runs = sorted(glob.glob(os.path.join(self.runs_dir, 'run-*.parquet')))
+        if not runs:
+            return 0
+        table = ds.dataset(self._files(), schema=SNAPSHOT_SCHEMA, format='parquet').to_table()
+        table = table.sort_by([('source', 'ascending'), ('source_id', 'ascending'), ('run_at', 'ascending')])
+        pq.write_table(table, self.history_path + '.tmp', compression='zstd', row_group_size=HISTORY_ROW_GROUP,
+                       use_dictionary=['source', 'source_id', 'title'],
+                       column_encoding={column: 'DELTA_BINARY_PACKED' for column in DELTA_COLUMNS})
+        os.replace(self.history_path + '.tmp', self.history_path)
+        for path in runs:
+            os.remove(path)
+        return len(runs)
+
+    def history(self, start=None, end=None, source=None, source_ids=None, titles=None):
+        """Snapshots between start and end (inclusive), optionally for some titles, in time order per title"""
+        files = self._files()
+        if not files:
+            return pd.DataFrame(columns=['source', 'source_id', 'run_at', 'title', 'rank', 'viewer_reviews',
+                                         'popularity'])
+        run_at_type = SNAPSHOT_SCHEMA.field('run_at').type
+        terms = []
+        if start is not None:
+            terms.append(ds.field('run_at') >= pa.scalar(_timestamp(start), run_at_type))
+        if end is not None:
+            terms.append(ds.field('run_at') <= pa.scalar(_timestamp(end), run_at_type))
+        if source is not None:
+            terms.append(ds.field('source') == source)
+        if source_ids is not None:
+            terms.append(ds.field('source_id').isin(list(source_ids)))
+        if titles is not None:
+            terms.append(ds.field('title').isin(list(titles)))
+        condition = None
+        for term in terms:
+            condition = term if condition is None else condition & term
+        table = ds.dataset(files, schema=SNAPSHOT_SCHEMA, format='parquet').to_table(filter=condition)
+        df = table.to_pandas()
+        df['viewer_reviews'] = df.pop('viewer_reviews_centi') / 100
+        df['rank'] = df['rank'].astype('Int32')
+        df['popularity'] = df['popularity'].astype('Int64')
+        return df.sort_values(['source', 'source_id', 'run_at'], kind='stable').reset_index(drop=True)
+
+    def as_of(self, when=None, **filters):
+        """Each title's latest snapshot at or before `when` (now by default)"""
+        df = self.history(end=when, **filters)
+        return df.groupby(['source', 'source_id'], sort=False).tail(1).reset_index(drop=True)
+
+    def runs(self):
+        """Distinct run times, oldest first"""
+        files = self._files()
+        if not files:
+            return []
+        run_at = ds.dataset(files, schema=SNAPSHOT_SCHEMA, format='parquet').to_table(columns=['run_at'])
+        return sorted(pd.unique(run_at.column('run_at').to_pandas()))
+
+    def trends(self, when=None, window_days=7):
+        """Momentum features per title: change in rank, viewer_reviews and popularity over the window.
+
+        Covers the titles recorded in the latest run at or before `when`
+        (the latest run by default); titles that run did not see are left out
+        rather than reported with a stale snapshot. Each is compared with its
+        snapshot as of window_days earlier, or its first snapshot for titles
+        newer than that. rank_delta is positive when a title climbed (null
+        without a MAL rank on both sides); *_per_week columns scale each
+        change by the actual time between the two snapshots.
+        """
+        now = self.as_of(when)
+        if now.empty:
+            return now
+        now = now[now['run_at'] == now['run_at'].max()].reset_index(drop=True)
+        end = _timestamp(when) if when is not None else now['run_at'].max()
+        before = self.as_of(end - pd.Timedelta(days=window_days))
+        earliest = self.history(end=end).groupby(['source', 'source_id'], sort=False).head(1)
+        before = pd.concat([before, earliest]).drop_duplicates(['source', 'source_id'], keep='first')
+
+        merged = now.merge(before[['source', 'source_id', 'run_at', 'rank', 'viewer_reviews', 'popularity']],
+                           on=['source', 'source_id'], how='left', suffixes=('', '_before'))
+        weeks = (merged['run_at'] - merged['run_at_before']).dt.total_seconds() / SECONDS_PER_WEEK
+        weeks = weeks.where(weeks > 0)
+        merged['rank_delta'] = merged['rank_before'] - merged['rank']
+        merged['viewer_reviews_delta'] = merged['viewer_reviews'] - merged['viewer_reviews_before']
+        merged['popularity_delta'] = merged['popularity'] - merged['popularity_before']
+        for column in ('rank_delta', 'viewer_reviews_delta', 'popularity_delta'):
+            merged[column.replace('_delta', '_per_week')] = (merged[column].astype(float) / weeks).replace(
+                [np.inf, -np.inf], np.nan)
+        return merged.drop(columns=['rank_before', 'viewer_reviews_before', 'popularity_before'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank/score/popularity history across scrape runs")
+    parser.add_argument('--dir', default='snapshots')
+    commands = parser.add_subparsers(dest='command', required=True)
+    append = commands.add_parser('append', help="record a .csv/.parquet dataset as one scrape run")
+    append.add_argument('dataset')
+    append.add_argument('--at', help="run time (default: the file's modification time)")
+    commands.add_parser('compact', help="fold pending runs into the delta-encoded history file")
+    history = commands.add_parser('history', help="print the snapshots of titles")
+    history.add_argument('titles', nargs='+')
+    trends = commands.add_parser('trends', help="write per-title momentum features to a CSV")
+    trends.add_argument('csv')
+    trends.add_argument('--at', help="as of this time (default: the latest run)")
+    trends.add_argument('--window-days', type=float, default=7)
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.dir)
+    if args.command == 'append':
+        store.append(load_records(args.dataset), args.at or os.path.getmtime(args.dataset))
+    elif args.command == 'compact':
+        folded = store.compact()
+        size = os.path.getsize(store.history_path) if os.path.exists(store.history_path) else 0
+        print(f"✅ Folded {folded} runs into {store.history_path} ({size / 1024:.1f} KiB)")
+    elif args.command == 'history':
+        print(store.history(titles=args.titles).to_string(index=False))
+    else:
+        df = store.trends(args.at, args.window_days)
+        df.to_csv(args.csv, index=False)
+        print(f"✅ Trend features for {len(df)} titles saved to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
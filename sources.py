@@ -0,0 +1,204 @@
+import queue
+import threading
+
+from entity_resolution import EntityIndex, normalize_title, record_aliases
+from score_normalization import ScoreNormalizer
+
+
+class Source:
+    """Somewhere anime records come from.
+
+    Implementations yield lists of row dicts (typically one list per fetched
+    page) from iter_batches, so a runner can stream them into a sink while
+    the scrape is still going. Closing the generator early must stop any
+    outstanding requests.
+    """
+
+    name = 'Unknown'
+
+    def iter_batches(self):
+        raise NotImplementedError
+
+
+class Sink:
+    """Where a SourceRunner delivers batches.
+
+    Tracks how many records each source added against an optional
+    target_count. `reserved` ({source name: count}) holds slots for a source
+    until it finishes, so a faster source cannot crowd a preferred one out.
+    """
+
+    def __init__(self, target_count=None, reserved=None):
+        self.target_count = target_count
+        self.reserved = dict(reserved or {})
+        self.added = {}
+
+    @property
+    def count(self):
+        return sum(self.added.values())
+
+    @property
+    def full(self):
+        return self.target_count is not None and self.count >= self.target_count
+
+    def has_room(self, source_name):
+        if self.target_count is None:
+            return True
+        held_for_others = sum(max(0, count - self.added.get(name, 0))
+                              for name, count in self.reserved.items() if name != source_name)
+        return self.count < self.target_count - held_for_others
+
+    def finish(self, source_name):
+        """A source is done; release whatever it had reserved"""
+        self.reserved.pop(source_name, None)
+
+    def write(self, source_name, records):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class DatasetSink(Sink):
+    """Collect streamed batches into one dataset, resolving titles across sources.
+
+    With resolve=True a record matching an already collected anime (via
+    EntityIndex) is merged into it instead of being added again. New records
+    stop being accepted once target_count is reached; merges still apply.
+    """
+
+    def __init__(self, target_count=None, resolve=True, reserved=None):
+        super().__init__(target_count, reserved)
+        self.index = EntityIndex() if resolve else None
+        self.records = []
+        self.merged = {}
+        self.score_normalizer = ScoreNormalizer()
+
+    def write(self, source_name, records):
+        for record in records:
+            if self.index is not None:
+                record_id = self.index.find(record)
+                if record_id is not None:
+                    self.index.merge(record_id, record)
+                    self.merged[source_name] = self.merged.get(source_name, 0) + 1
+                    continue
+            if not self.has_room(source_name):
+                continue
+            if self.index is not None:
+                self.index.add(record)
+            self.records.append(record)
+            self.added[source_name] = self.added.get(source_name, 0) + 1
+
+    def close(self):
+        """Calibrate scores across sources and return the collected records"""
+        # AniList scores 0-100 and MAL 0-10; map both onto one calibrated 0-10 score
+        self.score_normalizer = ScoreNormalizer().fit_records(self.records)
+        self.score_normalizer.apply(self.records)
+        for source_name in sorted(set(self.added) | set(self.merged)):
+            print(f"  {source_name}: {self.added.get(source_name, 0)} added, "
+                  f"{self.merged.get(source_name, 0)} merged into existing titles")
+        return self.records
+
+
+class StreamingSink(Sink):
+    """Pass batches through dedup -> transforms -> writer without keeping them.
+
+    Memory stays at a few batches whatever the target size: only the
+    normalized titles and aliases seen so far are remembered. A record is
+    dropped when its title or any alias matches one already written, which
+    catches the same show under its English and romaji names; fuzzy
+    (MinHash) merging is left to DatasetSink. `transforms` are callables that modify a batch in place
+    (score calibration with an already fitted ScoreNormalizer, MAL
+    enrichment) before it is handed to the writer.
+    """
+
+    def __init__(self, writer, target_count=None, transforms=(), reserved=None):
+        super().__init__(target_count, reserved)
+        self.writer = writer
+        self.transforms = list(transforms)
+        self.seen_titles = set()
+        self.duplicates = 0
+
+    def write(self, source_name, records):
+        batch = []
+        for record in records:
+            title = normalize_title(record.get('title'))
+            aliases = {normalize_title(alias) for alias in record_aliases(record)} - {''}
+            if not title or not aliases.isdisjoint(self.seen_titles):
+                self.duplicates += 1
+                continue
+            if not self.has_room(source_name):
+                break
+            self.seen_titles.update(aliases)
+            batch.append(record)
+            self.added[source_name] = self.added.get(source_name, 0) + 1
+
+        for transform in self.transforms:
+            transform(batch)
+        self.writer.write(batch)
+
+    def close(self):
+        """Finish the output files and return how many records were written"""
+        self.writer.close()
+        print(f"  Streamed {self.count} records ({self.duplicates} duplicate titles dropped): "
+              + ", ".join(f"{name} {count}" for name, count in sorted(self.added.items())))
+        return self.count
+
+
+_DONE = object()
+
+
+class SourceRunner:
+    """Run every source in its own thread and stream their batches into one sink.
+
+    Batches pass through a bounded queue, so a source that outpaces the sink
+    blocks instead of buffering its whole scrape. A failing source is reported
+    and the others carry on. Once the sink is full the sources are told to
+    stop and their generators are closed, cancelling prefetched pages.
+    """
+
+    def __init__(self, sources, sink, max_queued_batches=16):
+        self.sources = list(sources)
+        self.sink = sink
+        self.batches = queue.Queue(maxsize=max_queued_batches)
+        self.stop = threading.Event()
+        self.failures = {}
+
+    def _drain(self, source):
+        batches = source.iter_batches()
+        try:
+            for batch in batches:
+                if self.stop.is_set():
+                    break
+                self.batches.put((source, batch))
+        except Exception as e:
+            self.failures[source.name] = e
+        finally:
+            batches.close()
+            self.batches.put((source, _DONE))
+
+    def run(self):
+        """Block until every source has finished; returns sink.close()"""
+        threads = [threading.Thread(target=self._drain, args=(source,), daemon=True,
+                                    name=f"source-{source.name}")
+                   for source in self.sources]
+        for thread in threads:
+            thread.start()
+
+        remaining = len(threads)
+        while remaining:
+            source, batch = self.batches.get()
+            if batch is _DONE:
+                remaining -= 1
+                self.sink.finish(source.name)
+                if source.name in self.failures:
+                    print(f"❌ {source.name} failed: {self.failures[source.name]}")
+                continue
+            # Batches still in flight after the sink filled up can only merge, not add
+            self.sink.write(source.name, batch)
+            if self.sink.full:
+                self.stop.set()
+
+        for thread in threads:
+            thread.join()
+        return self.sink.close()
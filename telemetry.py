@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+# Upper bounds (seconds) of the request latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def endpoint(url):
+    """Host a request counts against, e.g. myanimelist.net or graphql.anilist.co"""
+    return urlparse(url).netloc or url
+
+
+class HostStats:
+    def __init__(self, window=10000):
+        self.attempts = 0
+        self.retries = 0
+        self.errors = 0  # Attempts that raised (timeouts, connection resets)
+        self.give_ups = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.status = {}
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latencies = deque(maxlen=window)  # Rolling window for percentiles
+
+
+class ParseStats:
+    def __init__(self):
+        self.pages = 0
+        self.records = 0
+        self.seconds = 0.0
+
+
+class ScrapeTelemetry:
+    """Thread-safe per-request and per-page measurements for one scrape run.
+
+    ConcurrentFetcher records every attempt (latency, bytes, status, whether
+    it was a retry or a cache hit) against the request's host; the scrapers
+    record how long each page took to parse and how many records it gave.
+    The run can be written out as a JSON report or served in the Prometheus
+    text format while the scrape is going.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.hosts = {}
+        self.parsing = {}
+        self.lock = threading.Lock()
+
+    def record_attempt(self, url, status, seconds, size=0, retry=False, from_cache=False):
+        """One request attempt; status is None when it raised instead of returning a response"""
+        with self.lock:
+            stats = self.hosts.setdefault(endpoint(url), HostStats())
+            stats.attempts += 1
+            stats.retries += bool(retry)
+            stats.cache_hits += bool(from_cache)
+            stats.bytes += size
+            if status is None:
+                stats.errors += 1
+            else:
+                stats.status[status] = stats.status.get(status, 0) + 1
+            stats.latency_sum += seconds
+            stats.latencies.append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.latency_buckets[i] += 1
+
+    def record_give_up(self, url):
+        with self.lock:
+            self.hosts.setdefault(endpoint(url), HostStats()).give_ups += 1
+
+    def record_parse(self, source, seconds, records):
+        """One page of `source` parsed into `records` records in `seconds`"""
+        with self.lock:
+            stats = self.parsing.setdefault(source, ParseStats())
+            stats.pages += 1
+            stats.records += records
+            stats.seconds += seconds
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """JSON-ready summary of the run so far"""
+        elapsed = self.elapsed
+        with self.lock:
+            hosts = {}
+            for host, stats in self.hosts.items():
+                latencies = np.array(stats.latencies)
+                hosts[host] = {
+                    'requests': stats.attempts,
+                    'retries': stats.retries,
+                    'errors': stats.errors,
+                    'give_ups': stats.give_ups,
+                    'cache_hits': stats.cache_hits,
+                    'bytes': stats.bytes,
+                    'status': {str(status): count for status, count in sorted(stats.status.items())},
+                    'requests_per_second': round(stats.attempts / elapsed, 3) if elapsed else None,
+                    'latency_ms': {
+                        'mean': round(stats.latency_sum / stats.attempts * 1000, 1),
+                        'p50': round(float(np.percentile(latencies, 50)) * 1000, 1),
+                        'p95': round(float(np.percentile(latencies, 95)) * 1000, 1),
+                        'max': round(float(latencies.max()) * 1000, 1),
+                    } if len(latencies) else {},
+                }
+            parsing = {
+                source: {
+                    'pages': stats.pages,
+                    'records': stats.records,
+                    'parse_seconds': round(stats.seconds, 3),
+                    'parse_ms_per_page': round(stats.seconds / stats.pages * 1000, 2) if stats.pages else None,
+                    'records_per_second': round(stats.records / elapsed, 2) if elapsed else None,
+                }
+                for source, stats in self.parsing.items()
+            }
+            total_records = sum(stats.records for stats in self.parsing.values())
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_seconds': round(elapsed, 3),
+            'records_per_second': round(total_records / elapsed, 2) if elapsed else None,
+            'hosts': hosts,
+            'parsing': parsing,
+        }
+
+    def save_report(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"📈 Scrape report saved to {filename}")
+
+    def summary_lines(self):
+        """One line per host and per parsed source, for the end of a run"""
+        report = self.report()
+        lines = []
+        for host, stats in report['hosts'].items():
+            statuses = ' '.join(f"{status}×{count}" for status, count in stats['status'].items())
+            lines.append(f"{host}: {stats['requests']} requests ({stats['retries']} retries, "
+                         f"{stats['give_ups']} given up), p50 {stats['latency_ms'].get('p50')} ms, "
+                         f"{stats['bytes'] / 1e6:.1f} MB, status {statuses or '-'}")
+        for source, stats in report['parsing'].items():
+            lines.append(f"{source}: {stats['pages']} pages parsed at {stats['parse_ms_per_page']} ms/page, "
+                         f"{stats['records_per_second']} records/s")
+        return lines
+
+    def prometheus_text(self):
+        """Metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        with self.lock:
+            hosts = sorted(self.hosts.items())
+            parsing = sorted(self.parsing.items())
+            metric('scrape_requests_total', 'counter', 'Request attempts by host and HTTP status',
+                   [({'host': host, 'status': status}, count)
+                    for host, stats in hosts for status, count in sorted(stats.status.items())])
+            metric('scrape_request_errors_total', 'counter', 'Request attempts that raised before a response',
+                   [({'host': host}, stats.errors) for host, stats in hosts])
+            metric('scrape_retries_total', 'counter', 'Request attempts that were retries',
+                   [({'host': host}, stats.retries) for host, stats in hosts])
+            metric('scrape_give_ups_total', 'counter', 'Requests abandoned after the last retry',
+                   [({'host': host}, stats.give_ups) for host, stats in hosts])
+            metric('scrape_cache_hits_total', 'counter', 'Responses served from the HTTP cache',
+                   [({'host': host}, stats.cache_hits) for host, stats in hosts])
+            metric('scrape_response_bytes_total', 'counter', 'Response body bytes received',
+                   [({'host': host}, stats.bytes) for host, stats in hosts])
+
+            lines.append('# HELP scrape_request_duration_seconds Request attempt latency')
+            lines.append('# TYPE scrape_request_duration_seconds histogram')
+            for host, stats in hosts:
+                for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    lines.append(f'scrape_request_duration_seconds_bucket{{host="{host}",le="{bound}"}} {count}')
+                lines.append(f'scrape_request_duration_seconds_bucket{{host="{host}",le="+Inf"}} {stats.attempts}')
+                lines.append(f'scrape_request_duration_seconds_sum{{host="{host}"}} {stats.latency_sum}')
+                lines.append(f'scrape_request_duration_seconds_count{{host="{host}"}} {stats.attempts}')
+
+            metric('scrape_pages_parsed_total', 'counter', 'Pages parsed by source',
+                   [({'source': source}, stats.pages) for source, stats in parsing])
+            metric('scrape_records_parsed_total', 'counter', 'Records parsed by source',
+                   [({'source': source}, stats.records) for source, stats in parsing])
+            metric('scrape_parse_seconds_total', 'counter', 'Time spent parsing pages by source',
+                   [({'source': source}, stats.seconds) for source, stats in parsing])
+        return '\n'.join(lines) + '\n'
+
+
+def make_handler(telemetry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send(200, 'text/plain; version=0.0.4', telemetry.prometheus_text().encode('utf-8'))
+            elif self.path == '/report':
+                self._send(200, 'application/json', json.dumps(telemetry.report()).encode('utf-8'))
+            else:
+                self._send(404, 'application/json', b'{"error": "not found"}')
+
+    return MetricsHandler
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def serve_metrics(telemetry, host='127.0.0.1', port=9108):
+    """Serve /metrics (Prometheus text) and /report (JSON) from a background thread"""
+    server = MetricsServer((host, port), make_handler(telemetry))
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics-server').start()
+    return server
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from aggregates import SummaryCube
+from features import prepare_dataset
+
+
+def _frame():
+    return pd.DataFrame([
+        {'title': 'Frieren', 'genre': 'Adventure', 'studio': 'Madhouse', 'number_of_episodes': 28,
+         'content_type': 'TV', 'viewer_reviews': 9.3, 'release_date': '2023', 'source': 'MyAnimeList'},
+        {'title': 'Mushishi', 'genre': 'Mystery', 'studio': 'Artland', 'number_of_episodes': 26,
+         'content_type': 'TV', 'viewer_reviews': 86, 'release_date': '2005', 'source': 'AniList'},
+        {'title': 'Untitled Pilot', 'genre': 'Drama', 'studio': 'Unknown', 'number_of_episodes': 1,
+         'content_type': 'OVA', 'viewer_reviews': None, 'release_date': '2010', 'source': 'AniList'},
+    ])
+
+
+def test_ratings_use_calibrated_score_across_sources():
+    df_clean = prepare_dataset(_frame())
+    cube = SummaryCube.build(df_clean)
+
+    ratings = cube.describe('ratings')
+    assert ratings['count'] == 2
+    assert ratings['mean'] == pytest.approx(df_clean['score'].mean(), abs=0.01)
+    assert 0 <= ratings['min'] <= ratings['max'] <= 10
+    assert set(cube.mean_by_type('ratings').index) == {'TV'}
+
+
+def test_top_rated_ranks_by_score():
+    df_clean = prepare_dataset(_frame())
+    top = SummaryCube.build(df_clean).top_rated_frame()
+
+    assert list(top.columns) == ['title', 'score', 'content_type', 'release_year']
+    assert list(top['title']) == list(df_clean.dropna(subset=['score']).nlargest(2, 'score')['title'])
+
@@ -0,0 +1,49 @@
+import mal_data
+from mal_data import AlternativeAnimeScraper
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("not JSON")
+        return self.body
+
+
+class FakeFetcher:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def post(self, url, payload):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def fetch(responses, monkeypatch, max_attempts=3):
+    sleeps = []
+    monkeypatch.setattr(mal_data.time, 'sleep', sleeps.append)
+    fetcher = FakeFetcher(responses)
+    page = AlternativeAnimeScraper().fetch_anilist_page(fetcher, 'https://graphql.anilist.co', 'query', 1, 50,
+                                                        max_attempts=max_attempts)
+    return page, fetcher.calls, sleeps
+
+
+def test_http_errors_are_not_retried(monkeypatch):
+    page, calls, sleeps = fetch([FakeResponse(404), FakeResponse(200)], monkeypatch)
+    assert page is None and calls == 1 and sleeps == []
+
+    page, calls, sleeps = fetch([None, FakeResponse(200)], monkeypatch)
+    assert page is None and calls == 1 and sleeps == []
+
+
+def test_graphql_errors_are_retried_without_a_final_sleep(monkeypatch):
+    ok = FakeResponse(200, {'data': {'Page': {'media': []}}})
+    page, calls, sleeps = fetch([FakeResponse(200, {'errors': ['busy']}), ok], monkeypatch)
+    assert page == {'media': []} and calls == 2 and len(sleeps) == 1
+
+    page, calls, sleeps = fetch([FakeResponse(200)] * 3, monkeypatch)
+    assert page is None and calls == 3 and len(sleeps) == 2
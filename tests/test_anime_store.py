@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from anime_store import AnimeStore, anime_key, load_records
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnimeStore(str(tmp_path / 'anime.sqlite'))
+
+
+def row(**overrides):
+    record = {'title': 'Frieren', 'genre': 'Adventure', 'studio': 'Madhouse', 'number_of_episodes': 28,
+              'release_date': '2023-09', 'content_type': 'Tv', 'viewer_reviews': 90, 'source': 'AniList'}
+    record.update(overrides)
+    return record
+
+
+def test_upsert_inserts_then_updates_only_changed_rows(store):
+    assert store.upsert([row(anilist_id=1), row(title='Dandadan', anilist_id=2)])['inserted'] == 2
+
+    counts = store.upsert([row(anilist_id=1, viewer_reviews=91), row(title='Dandadan', anilist_id=2)])
+
+    assert counts['updated'] == 1 and counts['unchanged'] == 1
+    last_change = store.changes_since()[-1]
+    assert (last_change['source_id'], last_change['op'], last_change['columns']) == ('1', 'update', ['viewer_reviews'])
+
+
+def test_title_keyed_row_moves_to_its_id_key(store):
+    store.upsert([row()])
+    assert anime_key(row()) == ('AniList', 'title:frieren:2023-09')
+
+    counts = store.upsert([row(anilist_id=154587)])
+
+    assert counts['rekeyed'] == 1 and counts['inserted'] == 0
+    df = store.frame()
+    assert len(df) == 1 and df['anilist_id'][0] == 154587
+    ops = [(change['source_id'], change['op']) for change in store.changes_since()]
+    assert ops[-2:] == [('title:frieren:2023-09', 'delete'), ('154587', 'insert')]
+
+
+def test_stale_title_keyed_duplicate_is_deleted(store):
+    store.upsert([row(anilist_id=154587)])
+    store.conn.execute("INSERT INTO anime (source, source_id, title) VALUES ('AniList', 'title:frieren:2023-09', 'Frieren')")
+
+    counts = store.upsert([row(anilist_id=154587)])
+
+    assert counts['replaced'] == 1
+    assert len(store.frame()) == 1
+
+
+def test_repo_dataset_gains_ids_without_duplicating(store):
+    records = load_records(os.path.join(REPO, '5000_anime_combined.csv'))
+    store.upsert(records)
+    stored = len(store.frame())
+
+    counts = store.upsert([dict(record, anilist_id=i + 1) for i, record in enumerate(records)])
+
+    assert counts['inserted'] == 0
+    assert len(store.frame()) == stored
+
+
+def test_merged_mal_row_is_replaced(store):
+    store.upsert([row(source='MyAnimeList', mal_id=52991, viewer_reviews=9.3)])
+
+    counts = store.upsert([row(anilist_id=154587, mal_id=52991)])
+
+    assert counts['replaced'] == 1
+    assert store.frame()['source'].tolist() == ['AniList']
+
+
+def test_delta_follows_consumer_cursor(store):
+    store.upsert([row(anilist_id=1)])
+    _, _, last = store.delta('trainer')
+    store.advance('trainer', last)
+    store.upsert([row(anilist_id=1, viewer_reviews=80), row(title='Dandadan', anilist_id=2)])
+
+    df, deleted, _ = store.delta('trainer')
+
+    assert sorted(df['title']) == ['Dandadan', 'Frieren'] and deleted == []
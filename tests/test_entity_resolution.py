@@ -0,0 +1,95 @@
+import pytest
+
+from records import AnimeRecord
+from sources import DatasetSink, StreamingSink
+
+
+def anilist_row(**overrides):
+    row = {'title': 'Attack on Titan', 'aliases': ['Shingeki no Kyojin'], 'genre': 'Action, Drama',
+           'studio': 'Wit Studio', 'number_of_episodes': 25, 'release_date': '2013-04', 'content_type': 'Tv',
+           'viewer_reviews': 85, 'source': 'AniList', 'anilist_id': 16498, 'popularity': 900000,
+           'favourites': 50000, 'trending': 12, 'status_completed': 700000, 'updated_at': 1700000000}
+    row.update(overrides)
+    return AnimeRecord.from_dict(row)
+
+
+def mal_row(**overrides):
+    row = {'title': 'Shingeki no Kyojin', 'genre': '', 'studio': '', 'number_of_episodes': 25,
+           'release_date': '2013', 'content_type': 'TV', 'viewer_reviews': 8.54, 'source': 'MyAnimeList',
+           'mal_id': 16498}
+    row.update(overrides)
+    return AnimeRecord.from_dict(row)
+
+
+@pytest.mark.parametrize('order', ['anilist_first', 'mal_first'])
+def test_anilist_row_wins_whichever_source_arrives_first(order):
+    sink = DatasetSink()
+    batches = [('AniList', [anilist_row()]), ('MyAnimeList', [mal_row()])]
+    if order == 'mal_first':
+        batches.reverse()
+    for source_name, batch in batches:
+        sink.write(source_name, batch)
+
+    assert len(sink.records) == 1
+    merged = sink.records[0]
+    assert merged['source'] == 'AniList'
+    assert merged['title'] == 'Attack on Titan'
+    assert merged['viewer_reviews'] == 85
+    for column, value in [('anilist_id', 16498), ('popularity', 900000), ('favourites', 50000),
+                          ('trending', 12), ('status_completed', 700000), ('updated_at', 1700000000)]:
+        assert merged[column] == value
+    # MAL still contributes what AniList lacks
+    assert merged['mal_id'] == 16498
+    assert 'Shingeki no Kyojin' in merged['aliases']
+    assert sorted(merged['merged_from']) == ['AniList', 'MyAnimeList']
+
+
+def test_mal_fills_fields_anilist_left_empty():
+    sink = DatasetSink()
+    sink.write('MyAnimeList', [mal_row(genre='Action', studio='Wit Studio')])
+    sink.write('AniList', [anilist_row(genre='', studio='')])
+
+    merged = sink.records[0]
+    assert merged['source'] == 'AniList'
+    assert merged['genre'] == 'Action'
+    assert merged['studio'] == 'Wit Studio'
+
+
+def test_merged_title_is_still_found_by_every_alias():
+    sink = DatasetSink()
+    sink.write('MyAnimeList', [mal_row()])
+    sink.write('AniList', [anilist_row()])
+
+    for title in ['Attack on Titan', 'Shingeki no Kyojin']:
+        assert sink.index.find({'title': title, 'release_date': '2013'}) == 0
+
+
+def test_incompatible_years_are_not_merged():
+    sink = DatasetSink()
+    sink.write('AniList', [anilist_row()])
+    sink.write('MyAnimeList', [mal_row(title='Attack on Titan', release_date='2023', number_of_episodes=None)])
+
+    assert len(sink.records) == 2
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, batch):
+        self.records.extend(batch)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('order', [('AniList', 'MyAnimeList'), ('MyAnimeList', 'AniList')])
+def test_streaming_sink_drops_duplicates_by_alias(order):
+    writer = ListWriter()
+    sink = StreamingSink(writer)
+    rows = {'AniList': anilist_row(), 'MyAnimeList': mal_row()}
+    for source in order:
+        sink.write(source, [rows[source]])
+
+    assert [record['source'] for record in writer.records] == [order[0]]
+    assert sink.duplicates == 1
@@ -0,0 +1,41 @@
+import time
+
+from fetcher import ConcurrentFetcher
+from http_cache import CachedSession, ResponseCache, cache_key, is_offline_miss
+
+
+def test_get_key_includes_params():
+    assert cache_key('GET', 'https://api.jikan.moe/v4/anime', params={'page': 2}) != \
+        cache_key('GET', 'https://api.jikan.moe/v4/anime', params={'page': 3})
+    assert cache_key('GET', 'https://api.jikan.moe/v4/anime', params={'page': 2, 'q': 'x'}) == \
+        cache_key('GET', 'https://api.jikan.moe/v4/anime?page=2&q=x')
+    assert cache_key('GET', 'https://myanimelist.net/topanime.php?limit=50') == \
+        'GET https://myanimelist.net/topanime.php?limit=50'
+
+
+def test_cache_hits_and_offline_misses_skip_the_limiter(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    urls = [f"https://myanimelist.net/topanime.php?limit={i * 50}" for i in range(5)]
+    for url in urls[:3]:
+        cache.set(cache_key('GET', url), url, 200, {}, b'<html></html>')
+    fetcher = ConcurrentFetcher(CachedSession(cache, offline=True), requests_per_second=0.2)
+
+    start = time.monotonic()
+    responses = [fetcher.fetch(url) for url in urls]
+
+    assert time.monotonic() - start < 2  # Five limited requests at 0.2 req/s would take 20s
+    assert [r.status_code for r in responses] == [200, 200, 200, 504, 504]
+    assert [is_offline_miss(r) for r in responses] == [False, False, False, True, True]
+
+
+def test_fresh_hit_served_online_without_network(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    url = 'https://unreachable.invalid/page'
+    cache.set(cache_key('GET', url), url, 200, {'Content-Type': 'text/html'}, b'cached')
+    session = CachedSession(cache, ttl=3600)
+
+    response = session.cached_response('GET', url)
+
+    assert response.content == b'cached' and response.from_cache
+    assert session.get(url).content == b'cached'
+    assert session.cached_response('GET', 'https://unreachable.invalid/other') is None
@@ -0,0 +1,43 @@
+import json
+import sqlite3
+
+import pytest
+import requests
+
+from mal_enrichment import EnrichmentCache, MalEnricher
+
+
+class JikanStub:
+    """Answers Jikan /anime/{id} requests without the network"""
+
+    def __init__(self):
+        self.requested = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        mal_id = url.rsplit('/', 1)[-1]
+        self.requested.append(mal_id)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'data': {'genres': [{'name': 'Drama'}],
+                                                 'studios': [{'name': f"Studio {mal_id}"}]}}).encode('utf-8')
+        return response
+
+
+def test_one_enricher_serves_every_batch(tmp_path):
+    session = JikanStub()
+    enricher = MalEnricher(session, EnrichmentCache(str(tmp_path / 'enrichment.sqlite')), requests_per_second=100)
+    first = [{'title': 'A', 'mal_id': 1, 'genre': '', 'studio': ''}]
+    second = [{'title': 'B', 'mal_id': 2, 'genre': '', 'studio': ''},
+              {'title': 'A again', 'mal_id': 1, 'genre': '', 'studio': ''}]
+
+    assert enricher.enrich(first) == 1
+    fetcher = enricher.fetcher
+    assert enricher.enrich(second) == 2
+
+    assert enricher.fetcher is fetcher
+    assert session.requested == ['1', '2']  # ID 1 came from the cache the second time
+    assert second[0]['studio'] == 'Studio 2'
+
+    enricher.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        enricher.cache.get_fresh(['1'], ttl=3600)
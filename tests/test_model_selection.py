@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from model_selection import cross_validate, fold_features, param_grid, time_series_folds
+from popularity_model import PopularityModel
+
+
+def dataset(n=120, seed=0):
+    rng = np.random.RandomState(seed)
+    years = np.sort(rng.randint(2000, 2024, size=n))
+    genres = np.where(years >= 2020, 'Isekai', rng.choice(['Action', 'Drama', 'Comedy'], size=n))
+    return pd.DataFrame({
+        'title': [f"Title {i}" for i in range(n)],
+        'genre': genres,
+        'studio': rng.choice(['Madhouse', 'MAPPA', 'Bones'], size=n),
+        'number_of_episodes': rng.choice([1, 12, 24], size=n),
+        'release_date': years.astype(str),
+        'content_type': rng.choice(['Tv', 'Movie'], size=n),
+        'viewer_reviews': rng.uniform(50, 90, size=n).round(),
+        'source': 'AniList',
+        'popularity': rng.randint(1000, 100000, size=n),
+    })
+
+
+def test_folds_train_strictly_before_validation():
+    years = dataset()['release_date'].astype(float).to_numpy()
+    folds = time_series_folds(years, n_splits=4)
+
+    assert len(folds) >= 2
+    previous_valid_until = -np.inf
+    for train_until, valid_until in folds:
+        assert train_until < valid_until
+        assert train_until >= previous_valid_until
+        assert ((years > train_until) & (years <= valid_until)).any()
+        previous_valid_until = valid_until
+
+
+def test_too_few_years_for_folds():
+    with pytest.raises(ValueError):
+        time_series_folds([2020, 2020, 2020], n_splits=3)
+
+
+def test_fold_features_fit_only_on_training_rows():
+    df_clean, _ = PopularityModel().labelled_rows(dataset())
+    years = df_clean['release_year'].to_numpy(dtype=float)
+
+    X = fold_features(df_clean, years, train_until=2019, valid_until=2023)
+
+    # 'Isekai' only appears after the training cutoff, so it is no column in this fold
+    train_only = PopularityModel().fit_encoders(df_clean[years <= 2019])
+    assert 'genre=Isekai' not in train_only.feature_names
+    assert X.shape == (len(df_clean), len(train_only.feature_names))
+    year_z = X[:, -1].toarray().ravel()
+    assert abs(year_z[years <= 2019].mean()) < 1e-6
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_cross_validate_scores_every_params_and_fold(max_workers):
+    results, summary = cross_validate(dataset(), param_grid([0.1, 10.0]), n_splits=3,
+                                      max_workers=max_workers, target='popularity')
+
+    assert len(summary) == 2
+    assert set(results['fold']) == set(range(results['fold'].max() + 1))
+    assert (results['train_rows'] > 0).all() and (results['valid_rows'] > 0).all()
+    assert np.isfinite(results['rmse']).all()
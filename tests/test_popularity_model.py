@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from popularity_model import PopularityModel
+
+
+def dataset():
+    return pd.DataFrame({
+        'title': ['A', 'B', 'C', 'D', 'E'],
+        'genre': ['Action', 'Drama', 'Action, Drama', 'Comedy', 'Drama'],
+        'studio': ['Madhouse', 'MAPPA', 'Madhouse', 'Bones', 'MAPPA'],
+        'number_of_episodes': [12, 24, None, 13, 1],
+        'release_date': ['2019', 'Unknown', '2021-04', '2022', '2023-01'],
+        'content_type': ['Tv', 'Tv', 'Tv', 'Movie', 'Movie'],
+        'viewer_reviews': [70, 80, 75, 60, 85],
+        'source': ['AniList'] * 5,
+        'popularity': [100, 200, np.nan, 400, 500],
+    })
+
+
+def test_caller_target_follows_rows_dropped_for_missing_year():
+    df_clean, y = PopularityModel().labelled_rows(dataset(), target=[1.0, 2.0, np.nan, 4.0, 5.0])
+
+    # B has no release year and C no label
+    assert df_clean['title'].tolist() == ['A', 'D', 'E']
+    assert y.tolist() == [1.0, 4.0, 5.0]
+
+
+def test_target_column_name():
+    df_clean, y = PopularityModel().labelled_rows(dataset(), target='popularity')
+
+    assert df_clean['title'].tolist() == ['A', 'D', 'E']
+    assert y.tolist() == [100, 400, 500]
+
+
+def test_target_length_must_match_rows():
+    with pytest.raises(ValueError):
+        PopularityModel().fit(dataset(), target=[1.0, 2.0])
+
+
+def test_fit_then_score_batch():
+    model = PopularityModel(alpha=0.1).fit(dataset())
+    predictions = model.predict_batch([{'title': 'New', 'genre': 'Drama', 'studio': 'MAPPA',
+                                        'number_of_episodes': 12, 'release_date': '2024', 'content_type': 'Tv'}])
+
+    assert predictions.shape == (1,) and np.isfinite(predictions).all()
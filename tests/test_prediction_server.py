@@ -0,0 +1,91 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from encoders import MultiHotEncoder
+from popularity_model import PopularityModel
+from prediction_server import MicroBatcher, coerce_row, create_server
+
+
+def trained_model():
+    df = pd.DataFrame({
+        'title': list('ABCDEF'),
+        'genre': ['Action', 'Drama', 'Action, Drama', 'Comedy', 'Drama', 'Action'],
+        'studio': ['Madhouse', 'MAPPA', 'Madhouse', 'Bones', 'MAPPA', 'Bones'],
+        'number_of_episodes': [12, 24, 12, 13, 1, 26],
+        'release_date': ['2018', '2019', '2020', '2021', '2022', '2023'],
+        'content_type': ['Tv', 'Tv', 'Tv', 'Movie', 'Movie', 'Tv'],
+        'viewer_reviews': [70, 80, 75, 60, 85, 72],
+        'source': ['AniList'] * 6,
+    })
+    return PopularityModel(alpha=0.1).fit(df)
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = create_server(trained_model(), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def post(server, body, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    connection.request('POST', '/predict', body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_small_and_large_encoder_paths_agree():
+    encoder = MultiHotEncoder('genre').fit(['Action, 5', 'Drama', '7'])
+    values = ['Action', None, 5, float('nan'), 'Drama, 7']
+
+    small = encoder.transform(values).toarray()
+    large = encoder.transform(values * 20).toarray()[:len(values)]
+
+    assert (small == large).all()
+    assert small[2].sum() == 1  # The number 5 is read as the token '5', as the pandas path does
+
+
+def test_coerce_row_rejects_unusable_values():
+    assert coerce_row({'title': 'X', 'number_of_episodes': '12', 'genre': 5, 'extra': [1]}) == \
+        {'title': 'X', 'number_of_episodes': 12.0, 'genre': '5'}
+    for bad in ({'number_of_episodes': 'twelve'}, {'number_of_episodes': -1}, {'number_of_episodes': [1]},
+                {'genre': ['Action']}):
+        with pytest.raises(ValueError):
+            coerce_row(bad)
+
+
+def test_one_failing_request_does_not_fail_its_batch():
+    class Model:
+        def predict_batch(self, rows):
+            if any(row.get('title') == 'bad' for row in rows):
+                raise ValueError('bad row')
+            return np.arange(len(rows), dtype=float)
+
+    batcher = MicroBatcher(Model(), max_wait_ms=200)
+    good = batcher.submit([{'title': 'a'}, {'title': 'b'}])
+    bad = batcher.submit([{'title': 'bad'}])
+
+    assert list(good.result(timeout=5)) == [0.0, 1.0]
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+
+
+def test_predict_and_bad_requests(server):
+    status, result = post(server, json.dumps({'title': 'New', 'genre': 'Drama', 'number_of_episodes': 12,
+                                              'release_date': '2024'}))
+    assert status == 200 and np.isfinite(result['predicted_popularity'])
+
+    assert post(server, json.dumps({'number_of_episodes': {'n': 1}}))[0] == 400
+    assert post(server, b'{not json')[0] == 400
+
+
+def test_negative_content_length_is_rejected(server):
+    status, result = post(server, b'', headers={'Content-Length': '-1'})
+
+    assert status == 400 and 'Content-Length' in result['error']
@@ -0,0 +1,61 @@
+import numpy as np
+
+from records import AnimeRecord
+from score_normalization import ScoreNormalizer
+from sources import DatasetSink
+
+
+def test_unscored_anilist_row_does_not_borrow_mal_score():
+    sink = DatasetSink()
+    sink.write('AniList', [AnimeRecord.from_dict({'title': 'Frieren', 'release_date': '2023', 'source': 'AniList'})])
+    sink.write('MyAnimeList', [AnimeRecord.from_dict({'title': 'Frieren', 'release_date': '2023',
+                                                      'viewer_reviews': 8.54, 'source': 'MyAnimeList'})])
+    records = sink.close()
+
+    assert len(records) == 1
+    assert records[0].get('viewer_reviews') is None
+    assert records[0]['source_scores'] == {'AniList': None, 'MyAnimeList': 8.54}
+    assert records[0].get('score') is None
+
+
+def test_source_scores_keep_each_sources_raw_value():
+    sink = DatasetSink()
+    sink.write('MyAnimeList', [AnimeRecord.from_dict({'title': 'Frieren', 'release_date': '2023',
+                                                      'viewer_reviews': 9.3, 'source': 'MyAnimeList'})])
+    sink.write('AniList', [AnimeRecord.from_dict({'title': 'Frieren', 'release_date': '2023',
+                                                  'viewer_reviews': 91, 'source': 'AniList'})])
+
+    assert sink.records[0]['source_scores'] == {'MyAnimeList': 9.3, 'AniList': 91}
+    assert sink.records[0]['viewer_reviews'] == 91
+
+
+def test_quantile_mapping_fitted_on_overlap():
+    rng = np.random.RandomState(0)
+    mal = rng.uniform(6, 9, size=200).round(2)
+    anilist = (mal * 10 - 5).round()  # AniList runs half a MAL point low
+    records = [{'source_scores': {'AniList': a, 'MyAnimeList': m}} for a, m in zip(anilist, mal)]
+
+    normalizer = ScoreNormalizer().fit_records(records)
+
+    assert 'AniList' in normalizer.mappings
+    assert np.allclose(normalizer.transform('AniList', [75]), [8.0], atol=0.1)
+    assert normalizer.transform('MyAnimeList', [8.2])[0] == 8.2
+
+
+def test_linear_fallback_without_enough_overlap():
+    normalizer = ScoreNormalizer(min_overlap=30).fit_records(
+        [{'source_scores': {'AniList': 80, 'MyAnimeList': 8.0}}] * 5)
+
+    assert normalizer.mappings == {}
+    assert normalizer.transform('AniList', [85])[0] == 8.5
+    assert np.isnan(normalizer.transform('AniList', [0])[0])
+
+
+def test_round_trip_keeps_mapping(tmp_path):
+    records = [{'source_scores': {'AniList': 50 + i // 2, 'MyAnimeList': 5 + i / 40}} for i in range(80)]
+    normalizer = ScoreNormalizer().fit_records(records)
+    path = tmp_path / 'score_normalizer.json'
+    normalizer.save(path)
+
+    loaded = ScoreNormalizer.load(path)
+    assert np.allclose(loaded.transform('AniList', [60, 70]), normalizer.transform('AniList', [60, 70]))
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from snapshots import SnapshotStore
+
+
+DAY = 24 * 3600
+START = 1_700_000_000
+
+
+def mal(title, mal_id, rank, score):
+    return {'title': title, 'source': 'MyAnimeList', 'mal_id': mal_id, 'rank': rank, 'viewer_reviews': score}
+
+
+def anilist(title, anilist_id, popularity):
+    return {'title': title, 'source': 'AniList', 'anilist_id': anilist_id, 'popularity': popularity,
+            'viewer_reviews': 80}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'snapshots'))
+
+
+def test_rank_is_mals_rank_not_scrape_position(store):
+    # Scrape order differs from MAL's ranking, and AniList rows have no rank
+    store.append([anilist('Frieren', 1, 500), mal('Gintama', 2, 7, 9.0), mal('Steins;Gate', 3, 3, 9.1)], START)
+
+    df = store.history().set_index('title')
+    assert df.loc['Steins;Gate', 'rank'] == 3
+    assert df.loc['Gintama', 'rank'] == 7
+    assert pd.isna(df.loc['Frieren', 'rank'])
+
+
+def test_trends_compare_against_window_start(store):
+    store.append([mal('Gintama', 2, 10, 8.9), anilist('Frieren', 1, 500)], START)
+    store.append([mal('Gintama', 2, 6, 9.0), anilist('Frieren', 1, 800)], START + 7 * DAY)
+
+    trends = store.trends().set_index('title')
+
+    assert trends.loc['Gintama', 'rank_delta'] == 4
+    assert trends.loc['Gintama', 'rank_per_week'] == pytest.approx(4)
+    assert trends.loc['Gintama', 'viewer_reviews_delta'] == pytest.approx(0.1)
+    assert trends.loc['Frieren', 'popularity_delta'] == 300
+    assert pd.isna(trends.loc['Frieren', 'rank_delta'])
+
+
+def test_trends_leave_out_titles_missing_from_the_latest_run(store):
+    store.append([mal('Gintama', 2, 10, 8.9), mal('Dropped', 9, 40, 7.0)], START)
+    store.append([mal('Gintama', 2, 8, 9.0)], START + 7 * DAY)
+
+    assert store.trends()['title'].tolist() == ['Gintama']
+    # As of the first run, both titles were present
+    assert sorted(store.trends(when=START + DAY)['title']) == ['Dropped', 'Gintama']
+
+
+def test_compaction_keeps_history(store):
+    for week in range(3):
+        store.append([mal('Gintama', 2, 10 - week, 9.0)], START + week * 7 * DAY)
+    before = store.history()
+
+    assert store.compact() == 3
+    pd.testing.assert_frame_equal(store.history(), before)
+    assert store.as_of(START + 8 * DAY)['rank'].tolist() == [9]